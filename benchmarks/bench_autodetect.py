@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for detecting the commands of a package while installing."""
+
+import types
+
+import pytest
+
+from benchmarks.synthetic import create_package
+from rcli import autodetect
+
+
+@pytest.mark.parametrize("subcommands", [10, 100, 1000, 10000])
+def test_get_commands(benchmark, tmpdir, monkeypatch, subcommands):
+    """Benchmark detecting the subcommands of a generated package tree."""
+    packages = create_package(str(tmpdir), "synthetic", subcommands)
+    monkeypatch.chdir(tmpdir)
+    dist = types.SimpleNamespace(packages=packages)
+    commands = benchmark.pedantic(
+        autodetect._get_commands, args=(dist,), rounds=3
+    )
+    assert len(commands["synthetic"]) == subcommands
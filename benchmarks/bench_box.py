@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for writing boxed and styled output to a pipe."""
+
+import contextlib
+
+import pytest
+import six
+
+from rcli.display import terminal
+from rcli.display.box import box
+from rcli.display.style import Style
+
+
+_BYTES = 1 << 30  # The amount of boxed output written by each benchmark.
+_WIDTH = 80
+_LINES = _BYTES // (_WIDTH + 1)
+_NESTED_LINES = 100000  # The number of lines written inside nested boxes.
+_STYLED_LINES = 100000  # The number of styled lines written.
+
+
+@pytest.fixture(params=[True, False], ids=["plain", "ansi"])
+def plain(request):
+    """Run a benchmark with and without plain output."""
+    terminal.set_plain(request.param)
+    yield request.param
+    terminal.set_plain(False)
+
+
+def _write_boxed(lines):
+    """Print lines inside a box."""
+    line = "x" * (_WIDTH - 4)
+    with box(size=_WIDTH):
+        for _ in six.moves.range(lines):
+            print(line)
+
+
+def test_boxed_output(benchmark, devnull, plain):
+    """Benchmark writing 1 GB of boxed output to /dev/null."""
+    benchmark.pedantic(_write_boxed, args=(_LINES,), rounds=1)
+
+
+def _write_nested(depth, lines):
+    """Print lines inside boxes nested depth levels deep."""
+    line = "x" * (_WIDTH - 4 * depth)
+    with contextlib.ExitStack() as stack:
+        for _ in six.moves.range(depth):
+            stack.enter_context(box(size=_WIDTH))
+        for _ in six.moves.range(lines):
+            print(line)
+
+
+@pytest.mark.parametrize("depth", range(1, 9))
+def test_nested_boxes(benchmark, devnull, depth):
+    """Benchmark writing lines inside boxes nested 1 to 8 levels deep."""
+    benchmark.pedantic(_write_nested, args=(depth, _NESTED_LINES), rounds=3)
+
+
+def _write_styled(lines):
+    """Print styled words inside nested styles and a box."""
+    error = Style(31, bold=True)
+    note = Style(34, dim=True)
+    with box(size=_WIDTH), Style(underlined=True):
+        for i in six.moves.range(lines):
+            with Style(32):
+                print(error("error"), note(f"note {i}"), "plain")
+
+
+def test_styled_lines(benchmark, devnull, plain):
+    """Benchmark printing lines that enter and combine styles."""
+    benchmark.pedantic(_write_styled, args=(_STYLED_LINES,), rounds=3)
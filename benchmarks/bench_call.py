@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for casting parsed arguments and calling subcommands."""
+
+import pytest
+
+from rcli import call
+
+
+def _command(options):
+    """Return a subcommand function with options annotated as ints."""
+    namespace = {}
+    exec(  # pylint: disable=exec-used
+        "def command({}):\n    return None\n".format(
+            ", ".join("opt_{}: int = 0".format(i) for i in range(options))
+        ),
+        namespace,
+    )
+    return namespace["command"]
+
+
+@pytest.mark.parametrize("options", [10, 50, 250])
+def test_call(benchmark, options):
+    """Benchmark calling a subcommand with many annotated options."""
+    func = _command(options)
+    args = {"--opt-{}".format(i): str(i) for i in range(options)}
+    benchmark(call.call, func, args)
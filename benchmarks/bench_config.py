@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for finding the subcommands of the active command."""
+
+import pytest
+
+from rcli import config
+
+
+def _discover():
+    """Create new settings and load the subcommands of the command."""
+    settings = object.__new__(config._RcliConfig)
+    settings.__init__()
+    return settings.subcommands
+
+
+@pytest.mark.parametrize("distributions", [10, 100, 1000])
+def test_discovery(benchmark, synthetic, distributions):
+    """Benchmark finding 100 subcommands among other distributions."""
+    synthetic(100, distributions)
+    assert len(_discover()) == 100
+    benchmark(_discover)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for running subcommands through the dispatcher."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.synthetic import create_script
+from rcli import dispatcher
+
+
+_SUBCOMMANDS = [10, 100, 1000, 10000]
+
+
+@pytest.mark.parametrize("subcommands", _SUBCOMMANDS)
+def test_main_cold(benchmark, synthetic, tmpdir, subcommands):
+    """Benchmark a new interpreter that imports rcli and runs a command."""
+    name, _ = synthetic(subcommands)
+    script = create_script(str(tmpdir), name)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    benchmark.pedantic(
+        subprocess.check_call,
+        args=([sys.executable, script, "sub0", "world", "--opt-0=1"],),
+        kwargs={"env": env, "stdout": subprocess.DEVNULL},
+        rounds=5,
+    )
+
+
+@pytest.mark.parametrize("subcommands", _SUBCOMMANDS)
+def test_main_warm(benchmark, synthetic, devnull, monkeypatch, subcommands):
+    """Benchmark running a command again in the same interpreter."""
+    name, _ = synthetic(subcommands)
+    monkeypatch.setattr(sys, "argv", [name, "sub0", "world", "--opt-0=1"])
+    assert dispatcher.main() == 0
+    benchmark(dispatcher.main)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the crash log capture handler."""
+
+import logging
+
+import pytest
+import six
+
+from rcli import log
+
+
+_CALLS = 1000000
+
+
+@pytest.fixture
+def logger():
+    """Return an isolated DEBUG logger that does not propagate to root."""
+    logger = logging.getLogger("rcli.benchmarks.logging")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    yield logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+
+def _debug_loop(logger):
+    """Log a debug message with arguments in a hot loop."""
+    debug = logger.debug
+    for i in six.moves.range(_CALLS):
+        debug("Processing item %d of %d.", i, _CALLS)
+
+
+def test_capture(benchmark, logger):
+    """Benchmark 1M debug calls captured for the crash log."""
+
+    def setup():
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(log._CaptureHandler())
+        return (logger,), {}
+
+    benchmark.pedantic(_debug_loop, setup=setup, rounds=3)
+
+
+def test_eager_capture(benchmark, logger):
+    """Benchmark 1M debug calls formatted into a stream as they happen."""
+
+    def setup():
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        handler = logging.StreamHandler(six.StringIO())
+        handler.setFormatter(logging.Formatter(log._LOGFILE_FORMAT))
+        logger.addHandler(handler)
+        return (logger,), {}
+
+    benchmark.pedantic(_debug_loop, setup=setup, rounds=3)
+
+
+def test_write_logfile(benchmark, logger, tmpdir, monkeypatch):
+    """Benchmark writing a crash log of 1M captured records."""
+    handler = log._CaptureHandler()
+    logger.addHandler(handler)
+    _debug_loop(logger)
+    monkeypatch.setattr(log, "_CAPTURE_HANDLER", handler)
+    monkeypatch.setattr(log.sys, "argv", ["bench"])
+    log.configure_logfile(str(tmpdir), "gzip")
+    try:
+        benchmark.pedantic(log.write_logfile, rounds=3)
+    finally:
+        log.configure_logfile()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for counting the items of a hot loop."""
+
+import sys
+
+import six
+from tqdm import tqdm
+
+import rcli.display
+
+
+_ITEMS = 100000000  # The number of items read by each benchmark.
+
+
+def _consume(items):
+    """Read every item of an iterable."""
+    for _ in items:
+        pass
+
+
+def _generate(count):
+    """Yield count items from a generator."""
+    for i in six.moves.range(count):
+        yield i
+
+
+def test_loop(benchmark):
+    """Benchmark a loop over 100M items without progress."""
+    benchmark.pedantic(_consume, args=(six.moves.range(_ITEMS),), rounds=1)
+
+
+def test_progress(benchmark, devnull):
+    """Benchmark counting a loop over 100M items."""
+    items = rcli.display.progress(six.moves.range(_ITEMS))
+    benchmark.pedantic(_consume, args=(items,), rounds=1)
+
+
+def test_progress_generator(benchmark, devnull):
+    """Benchmark counting a loop over 100M items of a generator."""
+    items = rcli.display.progress(_generate(_ITEMS))
+    benchmark.pedantic(_consume, args=(items,), rounds=1)
+
+
+def test_tqdm(benchmark, devnull):
+    """Benchmark a loop over 100M items wrapped by tqdm for comparison."""
+    items = tqdm(six.moves.range(_ITEMS), file=sys.stdout)
+    benchmark.pedantic(_consume, args=(items,), rounds=1)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for streaming large tables to a pipe."""
+
+import pytest
+import six
+
+from rcli.display import terminal
+from rcli.display.box import box
+from rcli.display.style import Alignment
+from rcli.display.table import Table
+
+
+_ROWS = 10000000  # The number of rows rendered by each benchmark.
+_WIDTH = 80
+
+
+@pytest.fixture
+def plain(devnull):
+    """Write plain output to the null device."""
+    terminal.set_plain()
+    yield devnull
+    terminal.set_plain(False)
+
+
+def _rows(count):
+    """Yield rows of an id, a name, a size and a status."""
+    for i in six.moves.range(count):
+        yield i, f"file-{i}.txt", i * 7 % 100003, "ok" if i % 13 else "failed"
+
+
+def _table(**kwargs):
+    """Return the table rendered by the benchmarks."""
+    return Table(
+        ["ID", "Name", "Size", "Status"],
+        align=[Alignment.RIGHT, Alignment.LEFT, Alignment.RIGHT],
+        columns=_WIDTH - 1,
+        **kwargs
+    )
+
+
+def test_table(benchmark, plain):
+    """Benchmark streaming 10M rows with declared column widths."""
+    table = _table(widths=[8, 20, 6, 6])
+    benchmark.pedantic(table.print, args=(_rows(_ROWS),), rounds=1)
+
+
+def test_sampled_table(benchmark, plain):
+    """Benchmark streaming 10M rows with widths measured from a sample."""
+    table = _table(sample=1000)
+    benchmark.pedantic(table.print, args=(_rows(_ROWS),), rounds=1)
+
+
+def test_boxed_table(benchmark, plain):
+    """Benchmark streaming 10M rows inside a box."""
+    table = _table(widths=[8, 20, 6, 6])
+
+    def render(rows):
+        with box(size=_WIDTH + 4):
+            table.print(rows)
+
+    benchmark.pedantic(render, args=(_rows(_ROWS),), rounds=1)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for formatting large usage docstrings."""
+
+import pytest
+
+from benchmarks.synthetic import create_doc
+from rcli import usage
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000, 10000])
+def test_format_usage(benchmark, size):
+    """Benchmark formatting a docstring with many commands and options."""
+    doc = create_doc(size, size)
+    benchmark(usage.format_usage, doc, 80)
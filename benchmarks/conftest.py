@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Common fixtures for benchmarks.
+
+Functions:
+    devnull: Redirect stdout to the null device.
+    synthetic: A factory that installs synthetic command packages and makes
+        one the active rcli command.
+"""
+
+import itertools
+import os
+import sys
+
+import pkg_resources
+import pytest
+
+from benchmarks import synthetic as _synthetic
+from rcli import config
+
+
+_names = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def _terminal_size(monkeypatch):
+    """Format for the same terminal size on every machine and commit."""
+    monkeypatch.setenv("COLUMNS", "80")
+    monkeypatch.setenv("LINES", "24")
+
+
+@pytest.fixture
+def devnull(monkeypatch):
+    """Redirect stdout to the null device as if it were piped there."""
+    with open(os.devnull, "w") as stream:
+        monkeypatch.setattr(sys, "stdout", stream)
+        yield stream
+
+
+@pytest.fixture
+def synthetic(tmpdir, monkeypatch):
+    """Return a factory that installs synthetic command packages.
+
+    The factory writes a package of subcommands and the metadata of other
+    distributions to a temporary directory, puts the directory first on
+    sys.path and in a new pkg_resources working set, and makes the package
+    the active rcli command.
+
+    Returns:
+        A function that takes the number of subcommands, the number of other
+        distributions and the number of options of each subcommand, and
+        returns the name of the command and the names of its packages.
+    """
+    root = str(tmpdir)
+
+    def install(subcommands, distributions=0, options=3):
+        """Install a synthetic command package."""
+        name = "synthetic{}".format(next(_names))
+        packages = _synthetic.create_package(root, name, subcommands, options)
+        _synthetic.create_distributions(root, distributions, name + "_tool")
+        monkeypatch.syspath_prepend(root)
+        working_set = pkg_resources.WorkingSet(sys.path)
+        monkeypatch.setattr(pkg_resources, "working_set", working_set)
+        monkeypatch.setattr(
+            pkg_resources, "iter_entry_points", working_set.iter_entry_points
+        )
+        monkeypatch.setattr(sys, "argv", [os.path.join(root, "bin", name)])
+        for attr, value in (
+            ("_command", None),
+            ("_subcommands", {}),
+            ("_version", None),
+            ("_entry_point", None),
+            ("_config", {}),
+        ):
+            monkeypatch.setattr(config.settings, attr, value)
+        return name, packages
+
+    return install
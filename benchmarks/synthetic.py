@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Synthetic command line packages for benchmarks.
+
+Functions:
+    create_package: Write a package of docopt-style subcommands and the
+        installed metadata that rcli reads for it.
+    create_distributions: Write the installed metadata of other packages
+        that declare rcli commands.
+    create_script: Write a console script that runs a synthetic command.
+    create_doc: Return a docopt-style docstring with many usage lines and
+        options.
+"""
+
+import json
+import os
+import textwrap
+
+
+_PER_MODULE = 100  # The number of subcommands written to each module.
+_PER_PACKAGE = 10  # The number of modules written to each subpackage.
+
+_FUNCTION = '''
+def sub{index}(name, {params}):
+    """Usage: {command} sub{index} [options] <name>
+
+    Run subcommand {index} of the synthetic {command} command.
+
+    Options:
+{options}
+    """
+'''
+
+
+def create_package(root, name, subcommands, options=3):
+    """Write a package of subcommands and its installed metadata.
+
+    Subcommands are functions with annotated options. They are spread over
+    modules of at most 100 subcommands, and the modules over subpackages of
+    at most 10 modules, so larger packages are also deeper trees. The entry
+    points are written to an egg-info directory next to the package, so the
+    package is installed once root is on the path of a WorkingSet.
+
+    Args:
+        root: The directory in which the package is written.
+        name: The name of the command and of the package.
+        subcommands: The number of subcommands.
+        options: The number of options of each subcommand.
+
+    Returns:
+        The names of the packages written.
+    """
+    packages = [name]
+    commands = []
+    _write(root, name, "__init__.py", "")
+    for start in range(0, subcommands, _PER_MODULE):
+        group = f"group_{start // _PER_MODULE // _PER_PACKAGE}"
+        if f"{name}.{group}" not in packages:
+            packages.append(f"{name}.{group}")
+            _write(root, name, group, "__init__.py", "")
+        module = f"commands_{start // _PER_MODULE % _PER_PACKAGE}"
+        indexes = range(start, min(start + _PER_MODULE, subcommands))
+        _write(
+            root,
+            name,
+            group,
+            f"{module}.py",
+            "".join(_function(name, i, options) for i in indexes),
+        )
+        commands += [
+            f"{name}:sub{i} = {name}.{group}.{module}:sub{i}"
+            for i in indexes
+        ]
+    _write_metadata(root, name, commands)
+    return packages
+
+
+def create_distributions(root, count, prefix="tool"):
+    """Write the installed metadata of other rcli packages.
+
+    Each distribution has a console script and one subcommand, so it is
+    scanned, but not loaded, while the subcommands of a command are found.
+
+    Args:
+        root: The directory in which the metadata is written.
+        count: The number of distributions.
+        prefix: The start of the name of each distribution.
+    """
+    for i in range(count):
+        name = f"{prefix}{i}"
+        _write_metadata(root, name, [f"{name}:run = {name}:run"])
+
+
+def create_script(root, name):
+    """Write a console script that runs a synthetic command.
+
+    Args:
+        root: The directory in whose bin directory the script is written.
+        name: The name of the command.
+
+    Returns:
+        The path of the script.
+    """
+    return _write(
+        root,
+        "bin",
+        name,
+        "import sys\n"
+        "from rcli.dispatcher import main\n"
+        "sys.exit(main())\n",
+    )
+
+
+def create_doc(commands, options):
+    """Return a docopt-style docstring with many usage lines and options.
+
+    Args:
+        commands: The number of usage lines.
+        options: The number of options.
+
+    Returns:
+        The docstring.
+    """
+    usage = "\n".join(
+        f"  cmd sub{i} [--opt-{i % options} <value>] <name> [<args>...]"
+        for i in range(commands)
+    )
+    definitions = "\n".join(
+        f"  --opt-{i} <value>  Set option {i} of the synthetic command, "
+        "which has a description long enough to wrap. [default: 0]"
+        for i in range(options)
+    )
+    return f"Usage:\n{usage}\n\nOptions:\n{definitions}\n"
+
+
+def _function(command, index, options):
+    """Return the source of a subcommand function."""
+    return _FUNCTION.format(
+        command=command,
+        index=index,
+        params=", ".join(f"opt_{i}: int = 0" for i in range(options)),
+        options=textwrap.indent(
+            "\n".join(
+                f"--opt-{i} <value>  Option {i}. [default: 0]"
+                for i in range(options)
+            ),
+            " " * 6,
+        ),
+    )
+
+
+def _write_metadata(root, name, commands):
+    """Write the egg-info directory of a distribution with rcli commands."""
+    info = f"{name}.egg-info"
+    _write(
+        root,
+        info,
+        "PKG-INFO",
+        f"Metadata-Version: 1.1\nName: {name}\nVersion: 1.0.0\n",
+    )
+    _write(
+        root,
+        info,
+        "entry_points.txt",
+        "[console_scripts]\n{} = rcli.dispatcher:main\n\n[rcli]\n{}\n".format(
+            name, "\n".join(commands)
+        ),
+    )
+    _write(root, info, "rcli-config.json", json.dumps({}))
+
+
+def _write(root, *parts):
+    """Write text to a file below root, creating its directory.
+
+    Args:
+        root: The base directory.
+        parts: The parts of the path of the file, followed by its text.
+
+    Returns:
+        The path of the file.
+    """
+    path = os.path.join(root, *parts[:-1])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(parts[-1])
+    return path
@@ -6,6 +6,7 @@ Functions:
 """
 
 import logging
+import os
 import sys
 import types  # noqa: F401 pylint: disable=unused-import
 import typing  # noqa: F401 pylint: disable=unused-import
@@ -21,9 +22,12 @@ from . import (  # noqa: F401 pylint: disable=unused-import
     usage,
 )
 from .config import settings
+from .display import configure_tasks, terminal
 
 _LOGGER = logging.getLogger(__name__)
 
+_TASK_OPTIONS = ("--no-cache", "--resume", "--shard", "--summary")
+
 
 def main():
     # type: () -> typing.Any
@@ -31,8 +35,15 @@ def main():
 
     If the command is 'help' then print the help message for the subcommand; if
     no subcommand is given, print the standard help message.
+
+    If stdout is not a terminal, styles and boxes are written without escape
+    codes and output is only flushed when the command exits or flushes it.
+    A piped stdout is not wrapped by colorama outside of Windows.
     """
-    colorama.init(strip=not sys.stdout.isatty())
+    tty = sys.stdout.isatty()
+    terminal.set_plain(not tty)
+    if tty or os.name == "nt":
+        colorama.init(strip=not tty)
     doc = usage.get_primary_command_usage()
     allow_subcommands = "<command>" in doc
     args = docopt(
@@ -41,7 +52,11 @@ def main():
     if sys.excepthook is sys.__excepthook__:
         sys.excepthook = log.excepthook
     try:
-        log.enable_logging(log.get_log_level(args))
+        log.enable_logging(
+            log.get_log_level(args), **log.get_capture_settings(settings)
+        )
+        log.configure_logfile(**log.get_logfile_settings(settings))
+        _configure_task_options(args)
         default_args = sys.argv[2 if args.get("<command>") else 1 :]
         if (
             args.get("<command>") == "help"
@@ -55,6 +70,38 @@ def main():
         return str(e)
 
 
+def _configure_task_options(args):
+    # type: (typing.Dict[str, typing.Any]) -> None
+    """Pass the task runner options to rcli.display.run_tasks.
+
+    The options are only accepted by commands that enable the task_options
+    setting. They are kept in the settings of this process, so commands run
+    in subprocesses do not inherit them. They are removed from sys.argv so
+    that they are not passed to the subcommand.
+
+    Args:
+        args: The parsed docopt arguments of the primary command.
+    """
+    index = (
+        sys.argv.index(args["<command>"])
+        if args.get("<command>") in sys.argv
+        else len(sys.argv)
+    )
+    options = {}
+    for option in _TASK_OPTIONS:
+        value = args.get(option)
+        if not value:
+            continue
+        options[option[2:].replace("-", "_")] = value
+        for i, arg in enumerate(sys.argv[:index]):
+            if arg == option or arg.startswith(option + "="):
+                count = 2 if arg == option and value is not True else 1
+                del sys.argv[i : i + count]
+                index -= count
+                break
+    configure_tasks(**options)
+
+
 def _get_subcommand(name):
     # type: (str) -> config.RcliEntryPoint
     """Return the function for the specified subcommand.
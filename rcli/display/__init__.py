@@ -3,6 +3,17 @@
 
 Classes:
     Status: A special exception that will set a status message.
+    Task: A task for run_tasks that may depend on other tasks.
+    TaskStream: Independent tasks read lazily by run_tasks from an iterable.
+    Stage: A step of a pipeline run by run_pipeline.
+    TaskProgress: A handle passed to tasks that report their own progress.
+    IterableProgress: Counts the items read from an iterable.
+    TaskCache: An on-disk store used to skip tasks whose inputs have not
+        changed.
+    TaskJournal: An append-only record of completed tasks used to resume an
+        interrupted run.
+    TaskDurations: An on-disk history of task durations used to estimate
+        progress and schedule the longest tasks first.
 
 Functions:
     hidden_cursor: A context manager that will hide the terminal cursor and
@@ -15,22 +26,62 @@ Functions:
         taken to complete the block.
     run_tasks: A function that takes a list of callables as tasks and prints
         a header, status messages for each task, and creates a progress bar
-        to show how much remains to be done.
+        to show how much remains to be done. Tasks may declare dependencies
+        and may be run concurrently on a pool of threads or processes.
+    run_pipeline: A function that passes items through stages connected by
+        bounded queues, showing the throughput and queue depth of each stage
+        while it runs and a status message for each stage when it is done.
+    progress: A function that wraps an iterable to show how many of its
+        items were read, between the header and footer lines used by
+        timed_display.
+    cancelled: A function that tells a task running on a thread pool
+        whether its run was interrupted.
+    configure_tasks: Set the run_tasks options given on the command line.
 """
 
+
 import contextlib
+import contextvars
+import functools
 import logging
 import sys
 import time
 
 from colorama import Cursor, Fore, Style
-from tqdm import tqdm
 
-from .terminal import cols as _ncols
+from .live import LiveRegion
+from .progress import (  # noqa: F401 pylint: disable=unused-import
+    IterableProgress,
+    TaskProgress,
+)
+from .io import flush as _flush
+from .terminal import cols as _ncols, is_plain as _is_plain
 
 
 _LOGGER = logging.getLogger(__name__)
 
+_cancel = contextvars.ContextVar("task_cancel", default=None)
+_TASK_SETTINGS = {
+    "no_cache": False,
+    "resume": False,
+    "shard": None,
+    "summary": None,
+}
+
+_RUNNER_NAMES = frozenset(  # The names imported from runner when used.
+    (
+        "Stage",
+        "Task",
+        "TaskCache",
+        "TaskDurations",
+        "TaskGraph",
+        "TaskJournal",
+        "TaskStream",
+        "run_pipeline",
+        "run_tasks",
+    )
+)
+
 
 class Status(Exception):
     """A special exception that will alter the default task display."""
@@ -55,17 +106,27 @@ class Status(Exception):
 @contextlib.contextmanager
 def hidden_cursor():
     """Temporarily hide the terminal cursor."""
+    _hide_cursor()
+    try:
+        yield
+    finally:
+        _show_cursor()
+
+
+def _hide_cursor():
+    """Hide the terminal cursor."""
     if sys.stdout.isatty():
         _LOGGER.debug("Hiding cursor.")
         print("\x1B[?25l", end="")
         sys.stdout.flush()
-    try:
-        yield
-    finally:
-        if sys.stdout.isatty():
-            _LOGGER.debug("Showing cursor.")
-            print("\n\x1B[?25h", end="")
-            sys.stdout.flush()
+
+
+def _show_cursor():
+    """Show the terminal cursor on a new line."""
+    if sys.stdout.isatty():
+        _LOGGER.debug("Showing cursor.")
+        print("\n\x1B[?25h", end="")
+        sys.stdout.flush()
 
 
 @contextlib.contextmanager
@@ -81,17 +142,23 @@ def display_status():
         """
         print("\r" if sys.stdout.isatty() else "\t", end="")
         print(
-            "{}{}[{color}{msg}{}]{}".format(
-                Cursor.FORWARD(_ncols() - 8),
-                Style.BRIGHT,
-                Fore.RESET,
-                Style.RESET_ALL,
-                color=color,
-                msg=msg[:6].upper().center(6),
+            "{}{}".format(
+                "" if _is_plain() else Cursor.FORWARD(_ncols() - 8),
+                _format_status(msg, color),
             )
         )
-        sys.stdout.flush()
+        _flush()
+
+    with _caught_status(print_status):
+        yield
+
 
+@contextlib.contextmanager
+def _caught_status(print_status):
+    """Pass the status of the context block to print_status.
+
+    Errors are raised after their status is printed.
+    """
     try:
         yield
     except Status as e:
@@ -108,6 +175,19 @@ def display_status():
         print_status("OK", Fore.GREEN)
 
 
+def _format_status(msg, color):
+    """Return a six character status message in brackets."""
+    if _is_plain():
+        return "[{}]".format(msg[:6].upper().center(6))
+    return "{}[{color}{msg}{}]{}".format(
+        Style.BRIGHT,
+        Fore.RESET,
+        Style.RESET_ALL,
+        color=color,
+        msg=msg[:6].upper().center(6),
+    )
+
+
 @contextlib.contextmanager
 def timed_display(msg):
     """A timed block to run tasks with titles and success/failure messages.
@@ -116,23 +196,6 @@ def timed_display(msg):
         msg: The header message to print at the beginning of the timed block.
     """
 
-    def print_header(msg, newline=True):
-        """Print a header line.
-
-        Args:
-            msg: A message to be printed in the center of the header line.
-            newline: Whether or not to print a newline at the end of the
-                header. This can be convenient for allowing the line to
-                overwrite another.
-        """
-        if sys.stdout.isatty():
-            print("\r", end=Style.BRIGHT + Fore.BLUE)
-        print(
-            " {} ".format(msg).center(_ncols(), "="),
-            end="\n{}".format(Style.RESET_ALL) if newline else Style.RESET_ALL,
-        )
-        sys.stdout.flush()
-
     def print_message(msg):
         """Print a task title message.
 
@@ -143,42 +206,198 @@ def timed_display(msg):
             print("\r", end="")
             msg = msg.ljust(_ncols())
         print(msg, end="")
-        sys.stdout.flush()
+        _flush()
 
     start = time.time()
-    print_header(msg)
+    _print_header(msg)
     with hidden_cursor():
         try:
             yield print_message
         finally:
             delta = time.time() - start
-            print_header("completed in {:.2f}s".format(delta), False)
+            _print_header("completed in {:.2f}s".format(delta), False)
+
+
+def _print_header(msg, newline=True):
+    """Print a header line.
+
+    Args:
+        msg: A message to be printed in the center of the header line.
+        newline: Whether or not to print a newline at the end of the header.
+            This can be convenient for allowing the line to overwrite
+            another.
+    """
+    if sys.stdout.isatty():
+        print("\r", end=Style.BRIGHT + Fore.BLUE)
+    reset = "" if _is_plain() else Style.RESET_ALL
+    print(
+        " {} ".format(msg).center(_ncols(), "="),
+        end="\n{}".format(reset) if newline else reset,
+    )
+    _flush()
+
+
+def progress(iterable, total=None, header=None, unit="it", weight=None):
+    """Wrap an iterable to show how many of its items were read.
+
+    The count is shown on a line that is repainted about ten times per
+    second while the items are read, and is written once more when the
+    iterable is exhausted or the iterator is discarded, such as after a
+    loop over it is broken. If the output is not a terminal, only the final
+    count is written.
+
+    The wrapper adds tens of nanoseconds to each item of a sized iterable
+    and a little more to each item of a generator. See IterableProgress.
+
+    Args:
+        iterable: The iterable to read.
+        total: The number of items, or the sum of their weights. Defaults
+            to the length of the iterable if it has one and no weight is
+            given.
+        header: A message printed in a header line before the count, as
+            with timed_display. If given, a footer line with the time taken
+            is printed after it.
+        unit: The name of the unit counted, such as "lines".
+        weight: A callable that takes an item and returns the number of
+            units it counts for, such as len for chunks of lines.
+
+    Returns:
+        An iterator over the items of the iterable.
+    """
+    return iter(
+        IterableProgress(iterable, total, weight, _ProgressLine(header, unit))
+    )
+
 
+def configure_tasks(no_cache=False, resume=False, shard=None, summary=None):
+    """Set the run_tasks options given on the command line.
 
-def run_tasks(header, tasks):
-    """Run a group of tasks with a header, footer and success/failure messages.
+    The options apply to every later run_tasks call in this process. They
+    are not passed to other processes, so commands started by a task run
+    all of their own tasks.
 
     Args:
-        header: A message to print in the header bar before the tasks are run.
-        tasks: A list of tuples containing a task title, a task, and a weight.
-            If the tuple only contains two values, the weight is assumed to be
+        no_cache: If True, the cache is disabled.
+        resume: If True, runs skip the tasks completed by a previous run.
+        shard: The shard to run if the call does not give one.
+        summary: The summary file to append to if the call does not give
             one.
     """
-    tasks = list(tasks)
-    with timed_display(header) as print_message:
-        with tqdm(
-            tasks,
-            position=1,
-            desc="Progress",
-            disable=None,
-            bar_format="{desc}{percentage:3.0f}% |{bar}|",
-            total=sum(t[2] if len(t) > 2 else 1 for t in tasks),
-            dynamic_ncols=True,
-        ) as pbar:
-            for task in tasks:
-                print_message(task[0])
-                with display_status():
-                    try:
-                        task[1]()
-                    finally:
-                        pbar.update(task[2] if len(task) > 2 else 1)
+    _TASK_SETTINGS.update(
+        no_cache=no_cache, resume=resume, shard=shard, summary=summary
+    )
+
+
+def cancelled():
+    """Return whether the run of the current task was interrupted.
+
+    A run_tasks call that is interrupted, such as by Ctrl-C, raises the
+    interruption without waiting for the tasks running on a thread pool,
+    but the interpreter still waits for those threads before it exits.
+    Long running thread tasks may check this between steps and return
+    early so that the command exits promptly.
+
+    Returns:
+        True if the task is running on a thread pool of a run_tasks call
+        that was interrupted; otherwise, False.
+    """
+    cancel = _cancel.get()
+    return cancel is not None and cancel.is_set()
+
+
+@contextlib.contextmanager
+def _live_region():
+    """Yield a LiveRegion painting stdout if it is a terminal or None."""
+    if not sys.stdout.isatty():
+        yield None
+        return
+    with LiveRegion(sys.stdout) as live:
+        yield live
+
+
+class _ProgressLine(object):
+    """Paints the count of an IterableProgress below a header line."""
+
+    def __init__(self, header, unit):
+        """Initialize the line.
+
+        Args:
+            header: The message of the header line, or None for no header.
+            unit: The name of the unit counted.
+        """
+        self._header = header
+        self._unit = unit
+        self._region = contextlib.ExitStack()
+        self._live = None
+        self._started = False
+
+    def __call__(self, handle):
+        """Start or end the display of the count of the handle.
+
+        While the items are read, the count is painted by a live region on a
+        terminal. Once they are done, the final count is written.
+        """
+        if not self._started:
+            self._started = True
+            if self._header is not None:
+                _print_header(self._header)
+            _hide_cursor()
+            self._live = self._region.enter_context(_live_region())
+            if self._live:
+                self._live.set(
+                    "progress", functools.partial(self._format, handle)
+                )
+        if not handle.done:
+            return
+        if self._live:
+            self._live.remove("progress")
+            self._live.print(self._format(handle))
+        else:
+            print(self._format(handle))
+        self._region.close()
+        if self._header is not None:
+            _print_header("completed in {:.2f}s".format(handle.elapsed), False)
+        _show_cursor()
+
+    def _format(self, handle):
+        """Return the count of the handle for the width of the terminal."""
+        from tqdm import tqdm  # pylint: disable=import-outside-toplevel
+
+        return tqdm.format_meter(
+            handle.n,
+            handle.total,
+            handle.elapsed,
+            ncols=_ncols() - 1,
+            unit=self._unit,
+        )
+
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        """Import the task runner when one of its names is first used.
+
+        The runner needs tqdm, concurrent.futures and the task state
+        modules, so commands that do not run tasks never import them.
+        """
+        if name not in _RUNNER_NAMES:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(__name__, name)
+            )
+        from . import runner  # pylint: disable=import-outside-toplevel
+
+        return getattr(runner, name)
+
+
+else:  # pragma: no cover
+    from .runner import (  # noqa: F401 pylint: disable=unused-import
+        Stage,
+        Task,
+        TaskCache,
+        TaskDurations,
+        TaskGraph,
+        TaskJournal,
+        TaskStream,
+        run_pipeline,
+        run_tasks,
+    )
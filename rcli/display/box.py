@@ -1,42 +1,112 @@
 import contextlib
+import contextvars
 import functools
 
 from . import terminal
-from .io import AppendIOBase
+from .io import AppendIOBase, flush, redirect_stdout, stdout
 from .util import remove_invisible_characters, visible_len
 from .style import Alignment, Style
+from .wrap import wrap
+
+
+_depth = contextvars.ContextVar("box_depth", default=0)
+_stack = contextvars.ContextVar("box_stack", default=())
 
 
 class _BoxIO(AppendIOBase):
     def __init__(self, box_):
-        super().__init__()
+        parent = stdout()
+        super().__init__(
+            parent._stdout if isinstance(parent, _BoxIO) else parent
+        )
         self._box = box_
         self._style = Style.current()
+        self._stack = _stack.get()
         self._sep = remove_invisible_characters(self._box._get_sep())
+        self._layouts = {}
+
+    def fork(self, stdout):
+        fork = _BoxIO(self._box)
+        fork._stdout = stdout
+        fork._style = self._style
+        fork._stack = self._stack
+        return fork
 
     def write(self, s):
         super().write(
             f"{self._style if self._is_sep(s) else Style.current()}{s}"
         )
+        return len(s)
 
     def update_line(self, s):
-        stack = Box._stack
-        current_style = Style.current()
-        if self._is_sep(s):
-            stack = Box._stack[:-1]
-            current_style = self._style
-        left = " ".join(f"{box[1]}{box[0]._vertical}" for box in stack)
-        left += " " if left else ""
+        is_sep = self._is_sep(s)
+        current_style = self._style if is_sep else Style.current()
+        prefix, width, right = self._layout(is_sep)
+        line = f"{prefix}{current_style}{s}{self._style}"
+        if width is None:
+            return f"{line}{Style.reset}"
+        style, vertical, suffix = right
+        padding = width - visible_len(s)
+        if padding < 0 and not is_sep and width > 0:
+            return "\n".join(map(self.update_line, wrap(s, width)))
+        if padding < 0:
+            return self._get_overflowing_line(line, is_sep)
+        return f"{line}{style}{' ' * padding}{vertical}{suffix}"
+
+    def columns(self):
+        width = self._layout(False)[1]
+        return terminal.cols() if width is None else width
+
+    def _layout(self, is_sep):
+        key = (is_sep, terminal.is_plain(), terminal.width_key())
+        if key not in self._layouts:
+            self._layouts[key] = self._get_layout(is_sep)
+        return self._layouts[key]
+
+    def _get_layout(self, is_sep):
+        stack = self._stack[:-1] if is_sep else self._stack
+        prefix = f"{self._style}{self._get_left(stack)}"
+        if not stack:
+            return prefix, None, None
+        i = len(stack) - 1
+        box_, style = stack[-1]
+        width = (
+            (box_._size or terminal.cols())
+            - visible_len(prefix)
+            - visible_len(box_._vertical)
+            - i * 2
+        )
+        filled = f"{' ' * (visible_len(prefix) + width)}{box_._vertical}"
+        right = functools.reduce(
+            lambda r, b: self._get_right_append(r, b[0], *b[1]),
+            zip(range(i - 1, -1, -1), reversed(stack[:-1])),
+            filled,
+        )
+        return (
+            prefix,
+            width,
+            (style, box_._vertical, f"{right[len(filled):]}{Style.reset}"),
+        )
+
+    def _get_overflowing_line(self, line, is_sep):
+        stack = self._stack[:-1] if is_sep else self._stack
         return (
             functools.reduce(
                 lambda r, b: self._get_right_append(r, b[0], *b[1]),
                 zip(range(len(stack) - 1, -1, -1), reversed(stack)),
-                f"{self._style}{left}{current_style}{s}{self._style}",
+                line,
             )
             + Style.reset
         )
 
+    @staticmethod
+    def _get_left(stack):
+        left = " ".join(f"{box[1]}{box[0]._vertical}" for box in stack)
+        return f"{left} " if left else ""
+
     def _is_sep(self, s):
+        if self._sep[0] not in s:
+            return False
         cleaned_s = remove_invisible_characters(s)
         return (
             cleaned_s[:2] == self._sep[:2] and cleaned_s[-2:] == self._sep[-2:]
@@ -53,9 +123,6 @@ class _BoxIO(AppendIOBase):
 
 
 class Box:
-    _depth = 0
-    _stack = []
-
     def __init__(
         self,
         upper_left="\u250C",
@@ -106,14 +173,13 @@ class Box:
                     f"{self._upper_right}{Style.reset}",
                     self._header_style(text) if self._header_style else text,
                     align,
-                ),
-                flush=True,
+                )
             )
+        flush()
 
     def sep(self, text="", align=None):
-        print(
-            self._get_sep(text, align or self._sep_align), sep="", flush=True
-        )
+        print(self._get_sep(text, align or self._sep_align), sep="")
+        flush()
 
     def bottom(self, text="", align=None):
         with Style.current():
@@ -124,9 +190,9 @@ class Box:
                     f"{self._lower_right}{Style.reset}",
                     self._footer_style(text) if self._footer_style else text,
                     align,
-                ),
-                flush=True,
+                )
             )
+        flush()
 
     def _line(self, char, start, end, text="", align=None):
         size = self._size or terminal.cols()
@@ -134,7 +200,7 @@ class Box:
         if vislen:
             text = f" {text} "
             vislen += 2
-        width = size - 4 * (Box._depth - 1) - vislen - 4
+        width = size - 4 * (_depth.get() - 1) - vislen - 4
         if align == Alignment.CENTER:
             return f"{start}{char}{char * int(width / 2 + .5)}{text}{char * int(width / 2)}{char}{end}"
         if align == Alignment.RIGHT:
@@ -154,23 +220,23 @@ class Box:
         )
 
     def __enter__(self):
-        Box._depth += 1
+        _depth.set(_depth.get() + 1)
         self.top(self._header, self._header_align)
-        Box._stack.append((self, Style.current()))
+        _stack.set(_stack.get() + ((self, Style.current()),))
         return self
 
     def __exit__(self, *args, **kwargs):
-        Box._stack.pop()
+        _stack.set(_stack.get()[:-1])
         self.bottom(self._footer, self._footer_align)
-        Box._depth -= 1
+        _depth.set(_depth.get() - 1)
 
     @staticmethod
     def new_style(*args, **kwargs):
         @contextlib.contextmanager
         def inner(**kw):
             impl = Box(*args, **kwargs)
-            if Box._stack:
-                impl._size = Box._stack[-1][0]._size
+            if _stack.get():
+                impl._size = _stack.get()[-1][0]._size
             if "size" in kw:
                 impl._size = kw["size"]
             impl._header = kw.get("header", "")
@@ -184,7 +250,9 @@ class Box:
             impl._sep_align = kw.get(
                 "sep_align", kw.get("align", impl._sep_align)
             )
-            with impl, contextlib.redirect_stdout(impl._create_buffer()):
+            with impl, contextlib.closing(
+                impl._create_buffer()
+            ) as buffer, redirect_stdout(buffer):
                 yield impl
 
         return inner
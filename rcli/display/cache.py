@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""An on-disk store of task fingerprints used to skip unchanged tasks.
+
+Functions:
+    get_cache_dir: Return the directory used to store rcli state for the
+        running command.
+
+Classes:
+    TaskCache: Fingerprints tasks from their inputs, parameters and code and
+        remembers which fingerprints completed successfully.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+import types
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 10000  # The number of task entries kept before eviction.
+_MAX_FILES = 100000  # The number of file hashes kept before eviction.
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")  # Addresses in default reprs.
+_IMMUTABLE = (str, bytes, int, float, complex, tuple, frozenset, type(None))
+_READ_SIZE = 1 << 20  # The number of bytes read at a time while hashing.
+
+
+def get_cache_dir(*parts):
+    """Return a directory used to store rcli state for the running command.
+
+    The root directory is RCLI_CACHE_DIR if it is set; otherwise, it is the
+    rcli folder in the user cache directory.
+
+    Args:
+        parts: Path components to append to the command's cache directory.
+
+    Returns:
+        The path of the directory. It is not created.
+    """
+    root = os.environ.get("RCLI_CACHE_DIR")
+    if not root:
+        base = os.environ.get("XDG_CACHE_HOME") or os.environ.get(
+            "LOCALAPPDATA"
+        )
+        root = os.path.join(base or os.path.expanduser("~/.cache"), "rcli")
+    command = os.path.basename(os.path.realpath(os.path.abspath(sys.argv[0])))
+    return os.path.join(root, command, *parts)
+
+
+class TaskCache(object):
+    """Remembers the fingerprints of tasks that completed successfully."""
+
+    def __init__(
+        self, path=None, max_entries=_MAX_ENTRIES, max_files=_MAX_FILES
+    ):
+        """Load the cache.
+
+        Args:
+            path: The file used to store the cache. Defaults to tasks.json in
+                the command's cache directory.
+            max_entries: The number of task entries to keep. The least
+                recently used entries are evicted when the cache is saved.
+            max_files: The number of input and output file hashes to keep.
+                The least recently used hashes are evicted when the cache is
+                saved.
+        """
+        self._path = path or os.path.join(get_cache_dir(), "tasks.json")
+        self._max_entries = max_entries
+        self._max_files = max_files
+        self._entries = {}
+        self._files = {}
+        self._dirty = False
+        try:
+            with open(self._path) as cache_file:
+                data = json.load(cache_file)
+            self._entries = data["entries"]
+            self._files = data["files"]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            _LOGGER.debug("Starting a new task cache at %s.", self._path)
+
+    def fingerprint(self, task):
+        """Return the fingerprint of a task.
+
+        The fingerprint covers the task ID, its parameters, the contents of its
+        input files and the code of its callable. The code includes its
+        constants, the names it uses, its default arguments, the values it
+        closes over and the arguments bound by functools.partial. Functions
+        it calls through globals are only covered by name, so a task whose
+        result depends on other code should include a version in its params.
+
+        Args:
+            task: The Task to fingerprint.
+
+        Returns:
+            A hex digest, or None if the task does not declare any inputs,
+            outputs or parameters and cannot be cached.
+        """
+        if not (task.inputs or task.outputs or task.params is not None):
+            return None
+        digest = hashlib.sha256()
+        digest.update(
+            json.dumps(
+                [
+                    task.id,
+                    task.params,
+                    getattr(task.func, "__module__", None),
+                    getattr(task.func, "__qualname__", None),
+                    _hash_callable(task.func),
+                ],
+                sort_keys=True,
+                default=repr,
+            ).encode("utf-8")
+        )
+        for path in sorted(os.path.abspath(p) for p in task.inputs):
+            digest.update(path.encode("utf-8"))
+            digest.update((self._hash_file(path) or "missing").encode())
+        return digest.hexdigest()
+
+    def hit(self, task, fingerprint):
+        """Return whether the task completed before with the same fingerprint.
+
+        The outputs recorded for the task must also still exist unchanged.
+
+        Args:
+            task: The Task to look up.
+            fingerprint: The current fingerprint of the task.
+
+        Returns:
+            True if the task can be skipped.
+        """
+        entry = self._entries.get(task.id)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        for path, file_hash in entry["outputs"].items():
+            if self._hash_file(path) != file_hash:
+                return False
+        entry["used"] = time.time()
+        self._dirty = True
+        return True
+
+    def store(self, task, fingerprint):
+        """Record that a task completed successfully.
+
+        Args:
+            task: The Task that completed.
+            fingerprint: The fingerprint of the task before it ran.
+        """
+        self._entries[task.id] = {
+            "fingerprint": fingerprint,
+            "outputs": {
+                p: self._hash_file(p)
+                for p in (os.path.abspath(o) for o in task.outputs)
+            },
+            "used": time.time(),
+        }
+        self._dirty = True
+
+    def save(self):
+        """Evict the least recently used entries and write the cache."""
+        if not self._dirty:
+            return
+        entries = sorted(
+            self._entries.items(), key=lambda e: e[1]["used"], reverse=True
+        )
+        self._entries = dict(entries[: self._max_entries])
+        files = [p for p in self._files if os.path.exists(p)]
+        self._files = {
+            path: self._files[path]
+            for path in files[max(len(files) - self._max_files, 0) :]
+        }
+        directory = os.path.dirname(os.path.abspath(self._path))
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(
+                    {"entries": self._entries, "files": self._files},
+                    cache_file,
+                )
+            os.replace(temp, self._path)
+        except (IOError, OSError):
+            _LOGGER.exception("Unable to write the task cache.")
+        self._dirty = False
+
+    def _hash_file(self, path):
+        """Return the SHA-256 of a file or None if it does not exist.
+
+        Hashes are reused while the size and modification time of the file are
+        unchanged. Hashes are kept in the order they were last used.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        cached = self._files.pop(path, None)
+        if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            self._files[path] = cached
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(_READ_SIZE), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        self._files[path] = [stat.st_size, stat.st_mtime_ns, file_hash]
+        self._dirty = True
+        return file_hash
+
+
+def _hash_callable(func):
+    """Return a hex digest of the code and bound values of a callable."""
+    digest = hashlib.sha256()
+    _hash_value(func, digest, set())
+    return digest.hexdigest()
+
+
+def _hash_value(value, digest, seen):
+    """Add a value to a digest, following the code of callables.
+
+    Values other than functions are added by their repr without memory
+    addresses, so that objects with a default repr hash the same in every
+    run.
+    """
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(value, functools.partial):
+        for arg in (value.func,) + value.args:
+            _hash_value(arg, digest, seen)
+        _hash_value(sorted(value.keywords.items()), digest, seen)
+    elif isinstance(value, types.MethodType):
+        _hash_value(value.__self__, digest, seen)
+        _hash_value(value.__func__, digest, seen)
+    elif isinstance(value, types.FunctionType):
+        _hash_function(value, digest, seen)
+    else:
+        call = getattr(type(value), "__call__", None)
+        if isinstance(call, types.FunctionType):
+            _hash_function(call, digest, seen)
+        digest.update(_ADDRESS.sub("", repr(value)).encode("utf-8", "replace"))
+
+
+def _hash_function(func, digest, seen):
+    """Add the code, defaults and closure of a function to a digest.
+
+    Closed over functions and values of immutable types are added. Other
+    closed over objects, such as lists that collect results, are state
+    rather than inputs, so only their type is added.
+    """
+    _hash_code(func.__code__, digest)
+    _hash_value(func.__defaults__, digest, seen)
+    _hash_value(sorted((func.__kwdefaults__ or {}).items()), digest, seen)
+    for cell in func.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            continue
+        if callable(contents) or isinstance(contents, _IMMUTABLE):
+            _hash_value(contents, digest, seen)
+        else:
+            digest.update(type(contents).__qualname__.encode("utf-8"))
+
+
+def _hash_code(code, digest):
+    """Add a code object and the code objects nested in it to a digest."""
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, digest)
+        else:
+            digest.update(repr(const).encode("utf-8", "replace"))
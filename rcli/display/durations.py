@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""An on-disk history of how long tasks take to run.
+
+Classes:
+    TaskDurations: Remembers a decayed average of the observed duration of
+        each task ID and estimates the duration of tasks in later runs.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+
+from .cache import get_cache_dir
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 10000  # The number of task durations kept before eviction.
+_SMOOTHING = 0.3  # The weight given to the newest observed duration.
+
+
+class TaskDurations(object):
+    """A decayed average of the observed duration of each task."""
+
+    def __init__(
+        self, path=None, smoothing=_SMOOTHING, max_entries=_MAX_ENTRIES
+    ):
+        """Load the duration history.
+
+        Args:
+            path: The file used to store the history. Defaults to
+                durations.json in the command's cache directory.
+            smoothing: The weight, between 0 and 1, given to the newest
+                observation when it is averaged with the previous estimate.
+            max_entries: The number of task durations to keep. The least
+                recently updated durations are evicted when the history is
+                saved.
+        """
+        self._path = path or os.path.join(get_cache_dir(), "durations.json")
+        self._smoothing = smoothing
+        self._max_entries = max_entries
+        self._entries = {}
+        self._dirty = False
+        try:
+            with open(self._path) as durations_file:
+                self._entries = dict(json.load(durations_file))
+        except (IOError, OSError, ValueError, TypeError):
+            _LOGGER.debug("Starting a new duration history at %s.", self._path)
+
+    def estimate(self, task_id):
+        """Return the expected duration of a task in seconds or None."""
+        entry = self._entries.get(task_id)
+        return entry[0] if entry else None
+
+    def observe(self, task_id, seconds):
+        """Add the observed duration of a task that completed successfully.
+
+        Args:
+            task_id: The stable ID of the task.
+            seconds: The number of seconds the task took to run.
+        """
+        estimate = self.estimate(task_id)
+        if estimate is not None:
+            seconds += (1 - self._smoothing) * (estimate - seconds)
+        self._entries[task_id] = [seconds, time.time()]
+        self._dirty = True
+
+    def weights(self, tasks):
+        """Return the progress weight of each task in expected seconds.
+
+        Tasks without a history are assumed to take the average duration of
+        the tasks with one, scaled by their static weight.
+
+        Args:
+            tasks: The Task objects to weigh.
+
+        Returns:
+            A list of weights in the order given, or None if none of the
+            tasks have a nonzero history.
+        """
+        estimates = [self.estimate(task.id) for task in tasks]
+        known = [
+            (e, t.weight) for e, t in zip(estimates, tasks) if e is not None
+        ]
+        if not any(e for e, _ in known):
+            return None
+        per_weight = sum(e for e, _ in known) / (
+            sum(w for _, w in known) or len(known)
+        )
+        return [
+            e if e is not None else per_weight * task.weight
+            for e, task in zip(estimates, tasks)
+        ]
+
+    def save(self):
+        """Evict the least recently updated entries and write the history."""
+        if not self._dirty:
+            return
+        entries = sorted(
+            self._entries.items(), key=lambda e: e[1][1], reverse=True
+        )
+        self._entries = dict(entries[: self._max_entries])
+        directory = os.path.dirname(os.path.abspath(self._path))
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as durations_file:
+                json.dump(self._entries, durations_file)
+            os.replace(temp, self._path)
+        except (IOError, OSError):
+            _LOGGER.exception("Unable to write the task duration history.")
+        self._dirty = False
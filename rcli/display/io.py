@@ -1,34 +1,177 @@
+import contextlib
+import contextvars
 import io
 import sys
+import threading
 
+from . import terminal
 from .util import remove_invisible_characters
 
 
-class AppendIOBase(io.StringIO):
-    def __init__(self, stdout=sys.stdout):
-        super().__init__("", None)
-        self._stdout = stdout
+class AppendIOBase(io.TextIOBase):
+    def __init__(self, stdout=None):
+        super().__init__()
+        self._stdout = stdout or sys.stdout
+        self._partial = ""
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        lines = f"{self._partial}{s}".split("\n")
+        self._partial = lines.pop()
+        if lines:
+            self._stdout.write(
+                "".join(f"{self.update_line(line)}\n" for line in lines)
+            )
+        return len(s)
 
     def flush(self):
-        buffer = self.getvalue()
-        lines = buffer.split("\n")
-        nl = "\n".join(
-            self.update_line(line)
-            if remove_invisible_characters(line)
-            else line
-            for line in lines
-        )
-        self._stdout.write(nl)
-        self.clear_buffer()
-        self._stdout.flush()
+        flush(self._stdout)
 
     def update_line(self, s):
         return s
 
-    def clear_buffer(self):
-        self.truncate(0)
-        self.seek(0)
+    def fork(self, stdout):
+        return type(self)(stdout)
+
+    def columns(self):
+        return columns(self._stdout)
 
     def close(self):
-        self.flush()
+        if not self.closed:
+            if remove_invisible_characters(self._partial):
+                self._stdout.write(f"{self.update_line(self._partial)}\n")
+            else:
+                self._stdout.write(self._partial)
+            self._partial = ""
+            self.flush()
         super().close()
+
+
+def flush(stream=None):
+    stream = stream or sys.stdout
+    if isinstance(stream, AppendIOBase) or not terminal.is_plain():
+        stream.flush()
+
+
+def columns(stream=None):
+    stream = stream or stdout()
+    if isinstance(stream, AppendIOBase):
+        return stream.columns()
+    return terminal.cols()
+
+
+_current = contextvars.ContextVar("stdout", default=None)
+_lock = threading.Lock()
+_redirects = 0
+
+
+class _ContextStdout(io.TextIOBase):
+    def __init__(self, stdout):
+        super().__init__()
+        self._stdout = stdout
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return (_current.get() or self._stdout).write(s)
+
+    def flush(self):
+        flush(_current.get() or self._stdout)
+
+    def isatty(self):
+        return self._stdout.isatty()
+
+    def fileno(self):
+        return self._stdout.fileno()
+
+    @property
+    def encoding(self):
+        return self._stdout.encoding
+
+    def __getattr__(self, name):
+        if name == "_stdout":
+            raise AttributeError(name)
+        return getattr(self._stdout, name)
+
+
+def stdout():
+    current = _current.get()
+    if current is not None:
+        return current
+    if isinstance(sys.stdout, _ContextStdout):
+        return sys.stdout._stdout
+    return sys.stdout
+
+
+@contextlib.contextmanager
+def redirect_stdout(stream):
+    global _redirects
+    with _lock:
+        if not _redirects and not isinstance(sys.stdout, _ContextStdout):
+            sys.stdout = _ContextStdout(sys.stdout)
+        _redirects += 1
+    token = _current.set(stream)
+    try:
+        yield stream
+    finally:
+        _current.reset(token)
+        with _lock:
+            _redirects -= 1
+            if not _redirects and isinstance(sys.stdout, _ContextStdout):
+                sys.stdout = sys.stdout._stdout
+
+
+class Multiplexer:
+    def __init__(self, stream=None, block=False):
+        self._context = contextvars.copy_context()
+        self._parent = stream or stdout()
+        self._stream = (
+            self._parent._stdout
+            if isinstance(self._parent, AppendIOBase)
+            else self._parent
+        )
+        self._block = block
+        self._lock = threading.Lock()
+
+    def write(self, s):
+        with self._lock:
+            self._stream.write(s)
+        return len(s)
+
+    def flush(self):
+        with self._lock:
+            flush(self._stream)
+
+    @contextlib.contextmanager
+    def task(self):
+        tokens = [(var, var.set(val)) for var, val in self._context.items()]
+        block = io.StringIO() if self._block else None
+        if isinstance(self._parent, AppendIOBase):
+            buffer = self._parent.fork(block or self)
+        else:
+            buffer = AppendIOBase(block or self)
+        try:
+            with contextlib.closing(buffer), redirect_stdout(buffer):
+                yield buffer
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
+            if block is not None:
+                self.write(block.getvalue())
+                self.flush()
+
+
+def context_runner():
+    if isinstance(stdout(), AppendIOBase):
+        multiplexer = Multiplexer()
+
+        def run(func, *args):
+            with multiplexer.task():
+                return func(*args)
+
+        return run
+    context = contextvars.copy_context()
+    return lambda func, *args: context.copy().run(func, *args)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""A crash-safe record of the tasks completed by a run of run_tasks.
+
+Classes:
+    TaskJournal: An append-only file of completed task IDs that is synced to
+        disk in batches and can be used to resume an interrupted run.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+from .cache import get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+_LOGGER = logging.getLogger(__name__)
+
+_BATCH_SIZE = 32  # The number of records written between syncs.
+_SYNC_INTERVAL = 1.0  # The maximum number of seconds between syncs.
+
+
+class TaskJournal(object):
+    """An append-only record of the tasks that completed in a run."""
+
+    def __init__(
+        self, path, batch_size=_BATCH_SIZE, sync_interval=_SYNC_INTERVAL
+    ):
+        """Initialize the journal.
+
+        Args:
+            path: The path of the journal file.
+            batch_size: The number of records written before the file is
+                synced to disk.
+            sync_interval: The maximum number of seconds a record may wait
+                before the file is synced to disk.
+        """
+        self.path = path
+        self._batch_size = batch_size
+        self._sync_interval = sync_interval
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = 0.0
+
+    @classmethod
+    def for_header(cls, header, shard=None):
+        """Return the default journal for a run_tasks header.
+
+        Args:
+            header: The header of the run.
+            shard: The (i, n) tuple of the shard being run, if any. Each shard
+                has its own journal.
+
+        Returns:
+            A TaskJournal stored in the command's cache directory.
+        """
+        key = json.dumps([header, shard and list(shard)])
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        return cls(get_cache_dir("journals", "{}.journal".format(name)))
+
+    def completed(self):
+        """Return the IDs of the tasks recorded in the journal.
+
+        A partially written final record is ignored.
+        """
+        completed = set()
+        try:
+            with open(self.path) as journal_file:
+                for line in journal_file:
+                    try:
+                        completed.add(json.loads(line))
+                    except ValueError:
+                        _LOGGER.debug("Ignoring partial journal record.")
+        except (IOError, OSError):
+            pass
+        return completed
+
+    def open(self, resume=False):
+        """Open and lock the journal for writing.
+
+        If another run holds the lock on the journal, a warning is logged and
+        nothing is recorded by this run.
+
+        Args:
+            resume: If True, new records are appended to the existing journal;
+                otherwise, the journal is started over.
+
+        Returns:
+            The IDs of the tasks recorded by the previous run if resume is
+            True and the journal was locked; otherwise, an empty set.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        journal_file = open(self.path, "a")
+        try:
+            _lock(journal_file)
+        except (IOError, OSError):
+            journal_file.close()
+            _LOGGER.warning(
+                "The journal %s is in use by another run and will not be "
+                "written.",
+                self.path,
+            )
+            return set()
+        self._file = journal_file
+        self._synced_at = time.time()
+        if resume:
+            return self.completed()
+        journal_file.truncate(0)
+        return set()
+
+    def record(self, task_id):
+        """Append a completed task ID to the journal.
+
+        Args:
+            task_id: The stable ID of the completed task.
+        """
+        if not self._file:
+            return
+        self._file.write(json.dumps(task_id) + "\n")
+        self._unsynced += 1
+        if (
+            self._unsynced >= self._batch_size
+            or time.time() - self._synced_at >= self._sync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        """Flush the journal and sync it to disk."""
+        if self._file and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.time()
+
+    def close(self, remove=False):
+        """Sync and close the journal.
+
+        Args:
+            remove: If True, the journal file is deleted after it is closed.
+                This is done once every task has completed. A journal locked
+                by another run is never deleted.
+        """
+        if not self._file:
+            return
+        self.sync()
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                self._file.truncate(0)
+        self._file.close()
+        self._file = None
+
+
+def _lock(journal_file):
+    """Take an exclusive lock on an open journal without waiting for it.
+
+    The lock is released when the file is closed.
+
+    Raises:
+        IOError: Raised if another process holds the lock.
+    """
+    if fcntl:
+        fcntl.flock(journal_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:  # pragma: no cover
+        journal_file.seek(0)
+        msvcrt.locking(journal_file.fileno(), msvcrt.LK_NBLCK, 1)
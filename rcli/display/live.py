@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""A live region at the bottom of the terminal that is repainted in frames.
+
+Classes:
+    LiveRegion: Collects finished lines and changing status lines from any
+        thread and repaints them at a capped frame rate, writing only the
+        characters that changed since the last frame.
+"""
+
+import collections
+import logging
+import sys
+import threading
+
+import colorama
+
+from .terminal import cols as _ncols
+from .util import truncate, visible_len
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_ANSI_CSI = colorama.ansitowin32.AnsiToWin32.ANSI_CSI_RE
+_FPS = 20  # The default maximum number of frames painted per second.
+
+
+class LiveRegion(object):
+    """Lines that are repainted in place below the output of a command.
+
+    Lines passed to print are written once above the region. Lines passed to
+    set are kept at the bottom of the terminal and repainted whenever they
+    change, at most fps times per second. A value may be a callable that
+    returns the line, such as the formatter of a progress bar; it is only
+    called when a frame is painted.
+
+    If the stream is not a terminal, printed lines are written as they are
+    painted and the live lines are never shown.
+    """
+
+    def __init__(self, stream=None, fps=_FPS):
+        """Initialize the region.
+
+        Args:
+            stream: The stream to paint. Defaults to sys.stdout.
+            fps: The maximum number of frames painted per second.
+        """
+        self._stream = stream or sys.stdout
+        self._tty = self._stream.isatty()
+        self._interval = 1.0 / fps
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = []
+        self._live = collections.OrderedDict()
+        self._painted = []
+        self._row = 0
+
+    def __enter__(self):
+        """Start painting frames on a background thread."""
+        self._thread = threading.Thread(target=self._run, name="live-region")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop painting, write the pending lines and erase the live lines."""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            self._live.clear()
+            if self._tty and self._painted:
+                self._repaint(self._pending, [])
+                self._pending = []
+            else:
+                self._paint()
+            self._stream.flush()
+
+    def print(self, line):
+        """Write a finished line above the live lines in the next frame."""
+        with self._lock:
+            self._pending.append(line)
+
+    def set(self, key, value):
+        """Add or replace a live line.
+
+        Args:
+            key: A name for the line. New lines are added below the others.
+            value: The line or a callable that returns it.
+        """
+        with self._lock:
+            self._live[key] = value
+
+    def remove(self, key):
+        """Remove a live line if it exists."""
+        with self._lock:
+            self._live.pop(key, None)
+
+    def paint(self):
+        """Paint a frame now."""
+        with self._lock:
+            self._paint()
+            self._stream.flush()
+
+    def _run(self):
+        """Paint frames until the region is closed."""
+        while not self._stop.wait(self._interval):
+            self.paint()
+
+    def _paint(self):
+        """Write the pending lines and the changes to the live lines."""
+        pending, self._pending = self._pending, []
+        if not self._tty:
+            if pending:
+                self._stream.write("".join(p + "\n" for p in pending))
+            return
+        width = _ncols() - 1
+        lines = [
+            truncate(value() if callable(value) else value, width)
+            for value in self._live.values()
+        ]
+        if pending or len(lines) > len(self._painted):
+            self._repaint(pending, lines)
+            return
+        lines += [""] * (len(self._painted) - len(lines))
+        out = []
+        for row, (old, new) in enumerate(zip(self._painted, lines)):
+            if old != new:
+                out.append(self._move(row))
+                out.append(_diff(old, new))
+        self._painted = lines
+        self._stream.write("".join(out))
+
+    def _repaint(self, pending, lines):
+        """Write the pending lines over the live lines and repaint them."""
+        self._stream.write(
+            "".join(
+                [self._move(0), "\x1b[J"]
+                + [p + "\n" for p in pending]
+                + ["\n".join(lines)]
+            )
+        )
+        self._painted = lines
+        self._row = max(len(lines) - 1, 0)
+
+    def _move(self, row):
+        """Return the codes that move the cursor to the start of a row."""
+        offset, self._row = row - self._row, row
+        if offset < 0:
+            return "\r\x1b[{}A".format(-offset)
+        if offset > 0:
+            return "\r\x1b[{}B".format(offset)
+        return "\r"
+
+
+def _diff(old, new):
+    """Return the codes that turn the line old into new from its start.
+
+    Only the characters between the common prefix and, for lines of the same
+    length, the common suffix are written. Escape codes in the prefix are
+    written again so that the new characters keep their style, and a changed
+    escape code causes the rest of the line to be written.
+    """
+    start, end = _get_changed_span(old, new)
+    codes = []
+    for match in _ANSI_CSI.finditer(new):
+        if match.end() <= start:
+            codes.append(match.group())
+        elif match.start() < start:
+            start = match.start()
+        if match.start() < end < match.end():
+            end = match.end()
+    if visible_len(new[:end]) != visible_len(old[:end]) or _ANSI_CSI.search(
+        new[start:end]
+    ):
+        end = len(new)
+    if codes or "\x1b" in old:
+        codes.insert(0, "\x1b[0m")
+    column = visible_len(new[:start])
+    return "{}{}{}{}{}".format(
+        "\x1b[{}C".format(column) if column else "",
+        "".join(codes),
+        new[start:end],
+        "\x1b[0m" if codes and end < len(new) else "",
+        "\x1b[K" if visible_len(new) < visible_len(old) else "",
+    )
+
+
+def _get_changed_span(old, new):
+    """Return the start and end of the characters of new that differ from old.
+
+    The span excludes the common prefix and, for lines of the same length,
+    the common suffix.
+    """
+    start = 0
+    for start, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            break
+    else:
+        start = min(len(old), len(new))
+    end = len(new)
+    if len(old) == end:
+        while end > start and old[end - 1] == new[end - 1]:
+            end -= 1
+    return start, end
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Producer/consumer pipelines connected by bounded queues.
+
+Classes:
+    Stage: A titled callable applied to every item passing through a
+        pipeline by a fixed number of worker threads.
+    Pipeline: Runs the stages of a pipeline on threads connected by bounded
+        queues that apply backpressure to earlier stages.
+"""
+
+import logging
+import queue
+import threading
+
+from .io import context_runner
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAXSIZE = 100  # The default number of items queued before a stage.
+_TIMEOUT = 0.1  # The seconds between checks for a stopped pipeline.
+_DONE = object()  # Marks the end of the items sent to a worker.
+_STOPPED = object()  # Returned while waiting on a stopped pipeline.
+
+
+class Stage(object):
+    """A step of a pipeline."""
+
+    def __init__(self, title, func, workers=1, maxsize=_MAXSIZE):
+        """Initialize the stage.
+
+        Args:
+            title: The name displayed for the stage.
+            func: A callable that takes an item and returns the item passed
+                to the next stage.
+            workers: The number of threads running the stage.
+            maxsize: The number of items that may wait in the queue before
+                the stage. Earlier stages block while the queue is full.
+        """
+        self.title = title
+        self.func = func
+        self.workers = workers
+        self.maxsize = maxsize
+
+    @classmethod
+    def create(cls, stage):
+        """Return a Stage from a Stage or a (title, func[, ...]) tuple.
+
+        Args:
+            stage: A Stage object or a tuple containing a title, a callable,
+                and optionally a worker count and a queue size.
+
+        Returns:
+            The Stage object.
+        """
+        if isinstance(stage, Stage):
+            return stage
+        return cls(*stage)
+
+
+class Pipeline(object):
+    """Runs stages on threads connected by bounded queues.
+
+    The items of the source are passed to the first stage, the results of
+    each stage are passed to the next, and the results of the last stage are
+    discarded. If a stage raises an error, every thread stops and the error is
+    kept in the error attribute.
+    """
+
+    def __init__(self, source, stages):
+        """Initialize the pipeline.
+
+        Args:
+            source: An iterable of the items to process.
+            stages: An iterable of Stage objects or stage tuples.
+        """
+        self.stages = [Stage.create(s) for s in stages]
+        self.error = None
+        self.failed = None
+        self._source = source
+        self._queues = [queue.Queue(s.maxsize) for s in self.stages]
+        self._counts = [[0] * s.workers for s in self.stages]
+        self._finished = [0] * len(self.stages)
+        self._done = [False] * len(self.stages)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start the source and stage threads.
+
+        The threads run in the box and style state of the calling thread.
+        """
+        run = context_runner()
+        self._threads.append(
+            threading.Thread(
+                target=run, args=(self._feed,), name="pipeline-source"
+            )
+        )
+        for i, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                self._threads.append(
+                    threading.Thread(
+                        target=run,
+                        args=(self._work, i, worker),
+                        name="pipeline-{}-{}".format(stage.title, worker),
+                    )
+                )
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the pipeline to finish.
+
+        Args:
+            timeout: The maximum number of seconds to wait, or None to wait
+                until every thread has finished.
+
+        Returns:
+            True if every thread has finished.
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+        return True
+
+    def stop(self):
+        """Ask every thread to stop as soon as it is not running an item."""
+        self._stop.set()
+
+    def count(self, index):
+        """Return the number of items processed by a stage."""
+        return sum(self._counts[index])
+
+    def depth(self, index):
+        """Return the approximate number of items waiting for a stage."""
+        return self._queues[index].qsize()
+
+    def done(self, index):
+        """Return whether every worker of a stage finished its items."""
+        return self._done[index]
+
+    def _feed(self):
+        """Put the items of the source on the queue of the first stage."""
+        try:
+            for item in self._source:
+                if not self._put(0, item):
+                    return
+        except Exception as e:  # pylint: disable=broad-except
+            self._fail(0, e)
+            return
+        for _ in range(self.stages[0].workers):
+            self._put(0, _DONE)
+
+    def _work(self, index, worker):
+        """Process items for a stage until the previous stage is done."""
+        func = self.stages[index].func
+        counts = self._counts[index]
+        last = index == len(self.stages) - 1
+        while True:
+            item = self._get(index)
+            if item is _DONE:
+                break
+            if item is _STOPPED:
+                return
+            try:
+                result = func(item)
+            except Exception as e:  # pylint: disable=broad-except
+                self._fail(index, e)
+                return
+            counts[worker] += 1
+            if not last and not self._put(index + 1, result):
+                return
+        with self._lock:
+            self._finished[index] += 1
+            finished = self._finished[index] == self.stages[index].workers
+            self._done[index] = finished
+        if finished and not last:
+            for _ in range(self.stages[index + 1].workers):
+                self._put(index + 1, _DONE)
+
+    def _fail(self, index, error):
+        """Keep the first error and stop the pipeline."""
+        _LOGGER.debug(
+            'Stage "%s" failed.', self.stages[index].title, exc_info=True
+        )
+        with self._lock:
+            if self.error is None:
+                self.error = error
+                self.failed = index
+        self._stop.set()
+
+    def _put(self, index, item):
+        """Put an item on a queue unless the pipeline stops first."""
+        while not self._stop.is_set():
+            try:
+                self._queues[index].put(item, timeout=_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, index):
+        """Get an item from a queue unless the pipeline stops first."""
+        while not self._stop.is_set():
+            try:
+                return self._queues[index].get(timeout=_TIMEOUT)
+            except queue.Empty:
+                pass
+        return _STOPPED
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Progress reporting from inside long running tasks.
+
+Classes:
+    TaskProgress: A handle passed to tasks that report their own progress in
+        bytes, items or any other unit.
+    IterableProgress: Counts the items read from an iterable while adding
+        almost nothing to the cost of each item.
+"""
+
+import itertools
+import operator
+import time
+
+
+_INTERVAL = 0.1  # The target number of seconds between progress updates.
+
+
+class TaskProgress(object):
+    """Counts the progress of a running task.
+
+    Calls to advance only add to a counter until enough units have passed to
+    fill the update interval at the current rate, so it is cheap enough to
+    call for every item of a tight loop. The counter is then passed on to the
+    display.
+
+    A handle sent to a process pool is copied without its connection to the
+    display, so the progress of such a task is only shown once it finishes.
+    """
+
+    def __init__(self, weight=1, sink=None):
+        """Initialize the handle.
+
+        Args:
+            weight: The weight of the task on the shared progress bar.
+            sink: A callable that takes this handle and the amount of weight
+                completed since the last update.
+        """
+        self.n = 0
+        self.total = None
+        self.unit = "it"
+        self.rate = None
+        self.completed = 0
+        self._weight = weight
+        self._sink = sink
+        self._next = 1
+        self._last_n = 0
+        self._last_time = time.time()
+
+    def set_total(self, total, unit=None):
+        """Set the amount of work the task will do.
+
+        Args:
+            total: The number of units of work, such as the size of a file
+                being copied in bytes.
+            unit: The name of the unit, such as "B" for bytes. Defaults to
+                "it" for items.
+        """
+        self.total = total
+        if unit:
+            self.unit = unit
+        self._flush()
+
+    def advance(self, n=1):
+        """Add to the amount of work done.
+
+        Args:
+            n: The number of units of work done since the last call.
+        """
+        self.n += n
+        if self.n >= self._next:
+            self._flush()
+
+    def _flush(self):
+        """Update the rate and pass the completed weight to the sink."""
+        now = time.time()
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            self.rate = (self.n - self._last_n) / elapsed
+        self._last_n = self.n
+        self._last_time = now
+        self._next = self.n + max(1, int((self.rate or 0) * _INTERVAL))
+        if self._sink:
+            completed = (
+                self._weight * min(self.n, self.total) / self.total
+                if self.total
+                else 0
+            )
+            delta, self.completed = completed - self.completed, completed
+            self._sink(self, delta)
+
+    def __getstate__(self):
+        """Return the state of the handle without its sink."""
+        state = dict(self.__dict__)
+        state["_sink"] = None
+        return state
+
+
+class IterableProgress(object):
+    """Counts the items read from an iterable.
+
+    Items are read through islice objects chained by itertools, in chunks
+    sized to last about the update interval at the current rate, so no
+    Python code runs for most items. The count is read between chunks from
+    the length hint of the iterator, or for iterators without one, such as
+    generators, from a counter advanced by itertools.compress.
+
+    If a weight is given, such as len for chunks of lines, every item is
+    weighed as it is read and the count is the sum of the weights.
+
+    The sink is called when the first item is requested, at most once per
+    update interval after that, and once more with done set when the
+    iterable is exhausted or the loop over it stops.
+    """
+
+    def __init__(self, iterable, total=None, weight=None, sink=None):
+        """Initialize the counter.
+
+        Args:
+            iterable: The iterable to count.
+            total: The number of items, or the sum of their weights.
+                Defaults to the length of the iterable if it has one and
+                no weight is given.
+            weight: A callable that takes an item and returns the number of
+                units it counts for.
+            sink: A callable that takes this object.
+        """
+        if total is None and weight is None and hasattr(iterable, "__len__"):
+            total = len(iterable)
+        self.n = 0
+        self.total = total
+        self.elapsed = 0
+        self.done = False
+        self._iterable = iterable
+        self._weight = weight
+        self._sink = sink
+        self._start = None
+        self._last_n = 0
+        self._last_time = None
+        self._last_sink = None
+
+    def __iter__(self):
+        """Return an iterator over the items that counts them."""
+        if self._weight is not None:
+            return self._weighed()
+        return itertools.chain.from_iterable(self._chunks())
+
+    def _chunks(self):
+        """Yield chunks of the items, counting them between chunks."""
+        items, position = _counted(iter(self._iterable))
+        size = self._update(0)
+        try:
+            while True:
+                yield itertools.islice(items, size)
+                n = position()
+                if n - self.n < size:
+                    break
+                size = self._update(n)
+        finally:
+            self._update(position(), True)
+
+    def _weighed(self):
+        """Yield the items, adding their weights to the count."""
+        weight = self._weight
+        n = 0
+        update = self._update(n)
+        try:
+            for item in self._iterable:
+                n += weight(item)
+                if n >= update:
+                    update = n + self._update(n)
+                yield item
+        finally:
+            self._update(n, True)
+
+    def _update(self, n, done=False):
+        """Set the count, call the sink if it is time to, and size a chunk.
+
+        Returns:
+            The amount to read before the next update.
+        """
+        now = time.time()
+        if self._start is None:
+            self._start = self._last_time = now
+        elapsed = now - self._last_time
+        read = n - self._last_n
+        size = max(1, read * 2)
+        if elapsed > 0:
+            size = min(size, max(1, int(read * _INTERVAL / elapsed)))
+        self.n = n
+        self.elapsed = now - self._start
+        self.done = done
+        self._last_n = n
+        self._last_time = now
+        if self._sink and (
+            done
+            or self._last_sink is None
+            or now - self._last_sink >= _INTERVAL
+        ):
+            self._last_sink = now
+            self._sink(self)
+        return size
+
+
+def _counted(iterator):
+    """Get an iterator over the same items and a count of those read.
+
+    Returns:
+        The iterator and a callable that returns the number of items read
+        from it.
+    """
+    if hasattr(iterator, "__length_hint__"):
+        start = operator.length_hint(iterator)
+        return iterator, lambda: start - operator.length_hint(iterator)
+    counter = itertools.count(1)
+    peeks = itertools.count()
+    return (
+        itertools.compress(iterator, counter),
+        lambda: next(counter) - 1 - next(peeks),
+    )
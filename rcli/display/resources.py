@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Resource budgets that limit which tasks may run at the same time.
+
+Classes:
+    ResourceBudget: Tracks the resources held by running tasks and admits a
+        task only if its costs fit within the remaining budget.
+"""
+
+import logging
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResourceBudget(object):
+    """The amount of each resource that running tasks may hold at once."""
+
+    def __init__(self, limits=None):
+        """Initialize the budget.
+
+        Args:
+            limits: A dictionary mapping resource names, such as "cpu",
+                "memory" or "io", to the amount available. Resources that are
+                not listed are unlimited.
+        """
+        self.limits = dict(limits or {})
+        self._used = {name: 0 for name in self.limits}
+
+    def check(self, task):
+        """Ensure that a task can run once nothing else is running.
+
+        Args:
+            task: The Task to check.
+
+        Raises:
+            ValueError: Raised if a cost of the task exceeds the budget.
+        """
+        for name, cost in task.resources.items():
+            if cost > self.limits.get(name, cost):
+                raise ValueError(
+                    'Task "{}" needs {} {} but only {} is available.'.format(
+                        task.id, cost, name, self.limits[name]
+                    )
+                )
+
+    def fits(self, task):
+        """Return whether a task fits within the remaining budget."""
+        return all(
+            self._used[name] + cost <= self.limits[name]
+            for name, cost in task.resources.items()
+            if name in self.limits
+        )
+
+    def acquire(self, task):
+        """Hold the resources of a task that is starting."""
+        for name, cost in task.resources.items():
+            if name in self._used:
+                self._used[name] += cost
+        _LOGGER.debug("Resources in use: %s", self._used)
+
+    def release(self, task):
+        """Return the resources of a task that finished."""
+        for name, cost in task.resources.items():
+            if name in self._used:
+                self._used[name] -= cost
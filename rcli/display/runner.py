@@ -0,0 +1,797 @@
+# -*- coding: utf-8 -*-
+"""The task runner behind run_tasks and run_pipeline.
+
+rcli.display imports this module when one of its names is first used, so
+commands that do not run tasks do not import tqdm, concurrent.futures or the
+task state modules.
+
+Functions:
+    run_tasks: Run a group of tasks with a header, footer, progress bar and
+        success/failure messages.
+    run_pipeline: Pass items through stages connected by bounded queues.
+"""
+
+import concurrent.futures
+import contextlib
+import functools
+import logging
+import threading
+import time
+
+from colorama import Fore
+from tqdm import tqdm
+
+from . import (
+    _TASK_SETTINGS,
+    Status,
+    _cancel,
+    _caught_status,
+    _format_status,
+    _live_region,
+    display_status,
+    timed_display,
+)
+from .cache import TaskCache
+from .durations import TaskDurations
+from .journal import TaskJournal
+from .pipeline import (  # noqa: F401 pylint: disable=unused-import
+    Pipeline,
+    Stage,
+)
+from .progress import TaskProgress
+from .resources import ResourceBudget
+from .shards import parse_shard, partition, write_summary
+from .tasks import (  # noqa: F401 pylint: disable=unused-import
+    Task,
+    TaskGraph,
+    TaskStream,
+)
+from .io import context_runner
+from .terminal import cols as _ncols
+from .util import truncate, visible_len
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.1  # The seconds between checks for an interruption.
+
+_EXECUTORS = {
+    "thread": concurrent.futures.ThreadPoolExecutor,
+    "process": concurrent.futures.ProcessPoolExecutor,
+}
+
+
+def run_tasks(
+    header,
+    tasks,
+    max_workers=None,
+    executor="thread",
+    ordered=True,
+    fail_fast=True,
+    cache=False,
+    resume=False,
+    journal=False,
+    durations=False,
+    shard=None,
+    summary=None,
+    stream=False,
+    total=None,
+    resources=None,
+):
+    """Run a group of tasks with a header, footer and success/failure messages.
+
+    Tasks that fail cause every task that depends on them to be skipped. The
+    weight of skipped tasks is removed from the progress bar.
+
+    If a cache is used, tasks that declare inputs, outputs or params are
+    fingerprinted. If a task completed successfully before with the same
+    fingerprint and its outputs are unchanged, it is not run and is displayed
+    as CACHED.
+
+    If a journal is used, each completed task is recorded in it. The journal
+    is locked by the run, synced to disk in batches and removed once the run
+    succeeds. If the run is resumed, the tasks recorded by the previous run
+    are not run again and the progress bar is advanced by their weight.
+
+    If durations are used, the duration of every task that runs successfully
+    is remembered across runs. Once a task has a history, progress is
+    measured in expected seconds rather than static weights, the progress bar
+    shows an ETA, and concurrent runs start the ready tasks with the longest
+    expected remaining time first.
+
+    A run may be split deterministically across machines by giving each one a
+    different shard. Tasks connected by dependencies stay in the same shard
+    and shards are balanced by static task weight, so every machine agrees
+    on them whatever durations it has recorded. Each shard may append a
+    summary of its results to a file; the rcli-merge command combines the
+    summaries of every shard into one report.
+
+    If stream is True, tasks are read lazily from the iterable and only the
+    tasks that are running are held in memory, so any number of tasks may be
+    run. Streamed tasks may not depend on each other, their statuses are
+    printed as they complete, their durations are not recorded, and shards
+    take every n-th task rather than being balanced by weight. The progress
+    bar shows a count and rate unless an estimated total is given.
+
+    If a concurrent run is interrupted, such as by Ctrl-C, the tasks that
+    have not started are cancelled and the interruption is raised at once.
+    Tasks already running on threads cannot be stopped, and the interpreter
+    waits for them before it exits; they may call cancelled() to return
+    early.
+
+    Args:
+        header: A message to print in the header bar before the tasks are run.
+        tasks: A list of Task objects or tuples containing a task title, a
+            task, and a weight. If the tuple only contains two values, the
+            weight is assumed to be one.
+        max_workers: The maximum number of tasks to run at once. If None, the
+            tasks are run one after another in the calling thread in the
+            order given, subject to their dependencies. Otherwise, ready tasks
+            on the heaviest remaining path are started first.
+        executor: Either "thread" or "process". Tasks run on a process pool
+            must be picklable.
+        ordered: If True, status messages of concurrent tasks are printed in
+            the order the tasks were given; otherwise, they are printed as the
+            tasks complete.
+        fail_fast: If True, no new tasks are started after a task fails and
+            the failure is raised once the running tasks finish. If False,
+            every task that does not depend on a failed task is run and the
+            first failure is raised at the end.
+        cache: A TaskCache to use, True to use the command's default cache, or
+            False to always run every task. Passing --no-cache to the
+            command disables the cache.
+        resume: If True, skip the tasks recorded in the journal of a previous
+            run that did not finish. Passing --resume to the command enables
+            this. It has no effect unless a journal is used.
+        journal: A TaskJournal to use, True to use the default journal for the
+            header and shard, or False to disable the journal.
+        durations: A TaskDurations to use, True to use the command's default
+            duration history, or False to use the static task weights.
+        shard: A tuple of (i, n) or an "i/n" string to run only the i-th of n
+            shards of the tasks, counting from one. Passing --shard to the
+            command sets this.
+        summary: The path of a file to append a summary of the results to.
+            Passing --summary to the command sets this. Summaries are not
+            written for streamed tasks.
+        stream: If True, tasks may be any iterable, including a generator
+            that never ends, and are consumed as workers become free.
+        total: The estimated combined weight of streamed tasks, if known.
+        resources: A dictionary mapping resource names, such as "cpu",
+            "memory" or "io", to the amount available to concurrent tasks.
+            A task only starts once the resources it declares fit within
+            what the running tasks have left.
+
+    Raises:
+        ValueError: Raised if the executor is not "thread" or "process", if
+            the task dependencies are invalid, if the shard is invalid, if a
+            summary is requested for streamed tasks, or if a task needs more
+            of a resource than the budget allows.
+    """
+    if executor not in _EXECUTORS:
+        raise ValueError(
+            "executor must be one of: {}".format(", ".join(_EXECUTORS))
+        )
+    shard = shard or _TASK_SETTINGS["shard"]
+    shard = shard and parse_shard(shard)
+    if stream:
+        if summary:
+            raise ValueError("Summaries are not written for streamed tasks.")
+        durations = summary = None
+        graph = TaskStream(tasks, total, shard)
+    else:
+        if durations is True:
+            durations = TaskDurations()
+        graph = _get_graph(tasks, max_workers, durations, shard)
+        summary = summary or _TASK_SETTINGS["summary"]
+    cache, journal = _get_stores(header, shard, cache, journal)
+    resume = resume or _TASK_SETTINGS["resume"]
+    results = None if stream else {}
+    with _saved(journal, resume, cache, durations) as resumed:
+        with _summarized(summary, header, shard, graph, results):
+            with timed_display(header) as print_message:
+                with _live_region() as live, tqdm(
+                    position=1,
+                    desc="Progress",
+                    disable=False if live else None,
+                    file=_NullStream() if live else None,
+                    bar_format=_get_bar_format(graph, durations),
+                    total=graph.total_weight,
+                    dynamic_ncols=not live,
+                ) as pbar:
+                    if live:
+                        live.set(
+                            "progress", functools.partial(_format_bar, pbar)
+                        )
+                    reporter = _Reporter(
+                        print_message,
+                        ordered and max_workers is not None and not stream,
+                        fail_fast and max_workers is None,
+                        live,
+                    )
+                    runner = _Runner(
+                        graph,
+                        reporter,
+                        pbar,
+                        cache or None,
+                        journal,
+                        resumed,
+                        durations or None,
+                        results,
+                    )
+                    _run(runner, executor, max_workers, fail_fast, resources)
+        if reporter.errors:
+            raise reporter.errors[0]
+
+
+def run_pipeline(header, source, stages):
+    """Pass items through stages connected by bounded queues.
+
+    Each stage runs on its own worker threads. A stage blocks while the queue
+    before the next stage is full, so a slow stage slows the stages before it
+    instead of letting items pile up in memory. While the pipeline runs, a
+    progress line for each stage shows its throughput and queue depth. Once it
+    is done, a status message is printed for each stage.
+
+    If a stage raises an error, the pipeline stops, the failed stage is
+    displayed as FAILED, the unfinished stages are displayed as STOP, and the
+    error is raised.
+
+    Args:
+        header: A message to print in the header bar before the pipeline runs.
+        source: An iterable of the items passed to the first stage.
+        stages: A list of Stage objects or tuples containing a title, a
+            callable that takes an item and returns the item for the next
+            stage, and optionally a worker count and a queue size.
+    """
+    pipeline = Pipeline(source, stages)
+    with timed_display(header) as print_message:
+        with _live_region() as live:
+            if live:
+                start = time.time()
+                for i in range(len(pipeline.stages)):
+                    live.set(
+                        i,
+                        functools.partial(_format_stage, pipeline, i, start),
+                    )
+            try:
+                pipeline.start()
+                while not pipeline.join(_POLL_INTERVAL):
+                    pass
+            except BaseException:
+                pipeline.stop()
+                raise
+        reporter = _Reporter(print_message, False, False)
+        for i, stage in enumerate(pipeline.stages):
+            reporter.add(
+                i,
+                "{} ({} items)".format(stage.title, pipeline.count(i)),
+                _get_stage_result(pipeline, i),
+            )
+    if reporter.errors:
+        raise reporter.errors[0]
+
+
+def _format_stage(pipeline, index, start):
+    """Return the throughput and queue depth line of a pipeline stage."""
+    stage = pipeline.stages[index]
+    return tqdm.format_meter(
+        pipeline.count(index),
+        None,
+        time.time() - start,
+        prefix=stage.title,
+        unit="item",
+        bar_format="{desc}: {n_fmt} [{rate_fmt}{postfix}]",
+        postfix="queue {}/{}".format(pipeline.depth(index), stage.maxsize),
+    )
+
+
+def _get_stage_result(pipeline, index):
+    """Return a callable that raises the status of a pipeline stage."""
+
+    def result():
+        if pipeline.failed == index:
+            raise pipeline.error
+        if not pipeline.done(index):
+            raise Status("STOP", Fore.YELLOW)
+
+    return result
+
+
+class _NullStream(object):
+    """A stream that discards progress bars painted by the live region."""
+
+    def write(self, s):
+        """Discard the text."""
+
+    def flush(self):
+        """Do nothing."""
+
+
+def _format_bar(pbar):
+    """Return the progress bar line for the width of the terminal."""
+    return pbar.format_meter(**dict(pbar.format_dict, ncols=_ncols()))
+
+
+def _get_graph(tasks, max_workers, durations, shard):
+    """Return the TaskGraph of the tasks in the shard being run.
+
+    Shards are assigned by static weight so that every machine agrees on
+    them; recorded durations only order the tasks within the shard.
+    """
+    if shard:
+        graph = TaskGraph(tasks, critical_path=False)
+        tasks = [
+            graph.tasks[i] for i in partition(graph, shard[1])[shard[0] - 1]
+        ]
+    return TaskGraph(
+        tasks,
+        critical_path=max_workers is not None,
+        weights=durations and durations.weights,
+    )
+
+
+def _get_stores(header, shard, cache, journal):
+    """Return the task cache and journal of a run.
+
+    The cache is disabled if --no-cache was passed to the command, and True
+    is replaced by the default cache or journal.
+    """
+    if _TASK_SETTINGS["no_cache"]:
+        cache = False
+    if cache is True:
+        cache = TaskCache()
+    if journal is True:
+        journal = TaskJournal.for_header(header, shard)
+    return cache, journal
+
+
+def _run(runner, executor, max_workers, fail_fast, resources):
+    """Run the tasks in the calling thread or on a pool of max_workers."""
+    if max_workers is None:
+        runner.run_sequential()
+    else:
+        runner.run_concurrent(
+            _EXECUTORS[executor](max_workers=max_workers),
+            max_workers,
+            fail_fast,
+            ResourceBudget(resources),
+        )
+
+
+def _get_bar_format(graph, durations):
+    """Return the progress bar format for the graph or stream being run.
+
+    The postfix shows the task counts of concurrent runs and the throughput
+    of tasks that report their own progress.
+    """
+    if graph.total_weight is None:
+        return "{desc}: {n_fmt} [{elapsed}, {rate_fmt}{postfix}]"
+    if durations or isinstance(graph, TaskStream):
+        return "{desc}{percentage:3.0f}% |{bar}| [{remaining}{postfix}]"
+    return "{desc}{percentage:3.0f}% |{bar}| [{elapsed}{postfix}]"
+
+
+@contextlib.contextmanager
+def _saved(journal, resume, *stores):
+    """Save the task state stores and the journal when the block exits.
+
+    The block is given the IDs of the tasks completed by the run being
+    resumed. The journal is removed if the block completes without an error.
+    """
+    resumed = journal.open(resume) if journal else set()
+    succeeded = False
+    try:
+        yield resumed
+        succeeded = True
+    finally:
+        for store in stores:
+            if store:
+                store.save()
+        if journal:
+            journal.close(remove=succeeded)
+
+
+@contextlib.contextmanager
+def _summarized(path, header, shard, graph, results):
+    """Append a summary of the task results to a file when the block exits.
+
+    Tasks that never ran because an earlier task failed are listed as NOT RUN.
+    """
+    try:
+        yield
+    finally:
+        if path:
+            write_summary(
+                path,
+                header,
+                shard,
+                [
+                    {
+                        "id": task.id,
+                        "title": task.title,
+                        "status": results.get(i, ("NOT RUN",))[0],
+                        "seconds": results.get(i, (None, None))[1],
+                    }
+                    for i, task in enumerate(graph.tasks)
+                ],
+            )
+
+
+class _Reporter(object):
+    """Print task statuses in the order given or as the tasks complete."""
+
+    def __init__(self, print_message, ordered, raise_errors, live=None):
+        """Initialize the reporter.
+
+        Args:
+            print_message: The function used to print task titles.
+            ordered: If True, statuses are buffered and printed in the order
+                the tasks were given.
+            raise_errors: If True, task errors are raised immediately;
+                otherwise, they are collected in the errors attribute.
+            live: A LiveRegion used to print statuses instead of printing
+                them directly, or None.
+        """
+        self.errors = []
+        self.live = live
+        self._print_message = print_message
+        self._ordered = ordered
+        self._raise_errors = raise_errors
+        self._pending = {}
+        self._next = 0
+
+    def add(self, index, title, result):
+        """Report a task.
+
+        Args:
+            index: The index of the task in the order given.
+            title: The title of the task.
+            result: A callable that returns the task result or raises its
+                error.
+
+        Returns:
+            False if the task was reported and failed; otherwise, True.
+        """
+        if title is None:
+            result = None
+        if not self._ordered:
+            return self._report(title, result)
+        self._pending[index] = (title, result)
+        while self._next in self._pending:
+            self._report(*self._pending.pop(self._next))
+            self._next += 1
+        return True
+
+    def finish(self):
+        """Report all buffered tasks, skipping over tasks that never ran."""
+        for index in sorted(self._pending):
+            self._report(*self._pending.pop(index))
+
+    def _report(self, title, result):
+        """Print the title and status of a task."""
+        if result is None:
+            return True
+        if self.live:
+            status = _caught_status(functools.partial(self._print, title))
+        else:
+            self._print_message(title)
+            status = display_status()
+        try:
+            with status:
+                result()
+        except Exception as e:  # pylint: disable=broad-except
+            if self._raise_errors:
+                raise
+            self.errors.append(e)
+            return False
+        return True
+
+    def _print(self, title, msg, color):
+        """Add the title and status of a task to the live region."""
+        width = _ncols() - 8
+        self.live.print(
+            "{}{}{}".format(
+                truncate(title, width),
+                " " * (width - visible_len(title)),
+                _format_status(msg, color),
+            )
+        )
+
+
+class _Runner(object):
+    """Runs the tasks of a graph and reports their progress."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        graph,
+        reporter,
+        pbar,
+        cache,
+        journal,
+        resumed,
+        durations,
+        results,
+    ):
+        """Initialize the runner.
+
+        Args:
+            graph: The TaskGraph to run.
+            reporter: The _Reporter used to print task statuses.
+            pbar: The progress bar to update as tasks finish.
+            cache: A TaskCache or None.
+            journal: An open TaskJournal or None.
+            resumed: The IDs of tasks completed by a previous run.
+            durations: A TaskDurations or None.
+            results: A dictionary that maps the index of each task that was
+                resolved to its status and the seconds it ran for, or None if
+                the results are not kept.
+        """
+        self.graph = graph
+        self.reporter = reporter
+        self.pbar = pbar
+        self.cache = cache
+        self.journal = journal
+        self.resumed = resumed
+        self.durations = durations
+        self.results = results
+        self._fingerprints = {}
+        self._started = {}
+        self._handles = {}
+        self._counts = []
+        self._lock = threading.Lock()
+
+    def run_sequential(self):
+        """Run ready tasks one after another in the calling thread."""
+        for index in iter(self.next_task, None):
+            task = self.graph.tasks[index]
+
+            def result(index=index, task=task):
+                try:
+                    task.func(*self._start(index))
+                finally:
+                    self._stop(index)
+
+            try:
+                succeeded = self.reporter.add(index, task.title, result)
+            except Exception:
+                self.finish(index, False)
+                raise
+            self.finish(index, succeeded)
+
+    def run_concurrent(self, pool, max_workers, fail_fast, budget):
+        """Run ready tasks on an executor pool and report them here.
+
+        Ready tasks whose resource costs do not fit within the budget are
+        blocked until enough running tasks finish. Smaller ready tasks may
+        start in the meantime. The numbers of running, queued and blocked
+        tasks are shown on the progress bar.
+
+        If the calling thread is interrupted, tasks that have not started are
+        cancelled, cancelled() starts returning True in the running tasks,
+        and the interruption is raised without waiting for them. The pool is
+        shut down without waiting; on Python 3.14 and later, process pool
+        workers are also terminated.
+
+        Tasks run on threads see the box and style state of the calling
+        thread. Inside a box, each task writes whole lines to the box.
+        """
+        cancel = threading.Event()
+        token = _cancel.set(cancel)
+        submit = _get_submit(pool)
+        running = {}
+        blocked = []
+        stopped = False
+        interrupted = True
+        try:
+            while True:
+                while not stopped and len(running) < max_workers:
+                    index = self._admit(budget, blocked, max_workers)
+                    if index is None:
+                        break
+                    task = self.graph.tasks[index]
+                    running[submit(task.func, *self._start(index))] = index
+                self._show_counts(len(running), len(blocked))
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index = running.pop(future)
+                    task = self.graph.tasks[index]
+                    budget.release(task)
+                    self._stop(index)
+                    self.reporter.add(index, task.title, future.result)
+                    failed = _failed(future.exception())
+                    stopped = stopped or (failed and fail_fast)
+                    self.finish(index, not failed)
+            interrupted = False
+        finally:
+            _cancel.reset(token)
+            if interrupted:
+                cancel.set()
+                for future in running:
+                    future.cancel()
+                _terminate(pool)
+            else:
+                pool.shutdown()
+        self.reporter.finish()
+
+    def _admit(self, budget, blocked, lookahead):
+        """Return the index of a task that fits within the budget or None.
+
+        Blocked tasks are considered first, in the order they became ready.
+        At most lookahead ready tasks are held while they are blocked.
+        """
+        for i, index in enumerate(blocked):
+            if budget.fits(self.graph.tasks[index]):
+                budget.acquire(self.graph.tasks[index])
+                return blocked.pop(i)
+        while len(blocked) < lookahead:
+            index = self.next_task()
+            if index is None:
+                return None
+            task = self.graph.tasks[index]
+            budget.check(task)
+            if budget.fits(task):
+                budget.acquire(task)
+                return index
+            blocked.append(index)
+        return None
+
+    def _show_counts(self, running, blocked):
+        """Show the numbers of running, queued and blocked tasks."""
+        counts = ["running {}".format(running)]
+        if self.graph.queued is not None:
+            counts.append("queued {}".format(self.graph.queued))
+        counts.append("blocked {}".format(blocked))
+        with self._lock:
+            self._counts = counts
+            self._set_postfix()
+
+    def _start(self, index):
+        """Mark a task as started and return the arguments to call it with.
+
+        Tasks that report their own progress are passed a TaskProgress.
+        """
+        self._started[index] = time.time()
+        if self.reporter.live:
+            self.reporter.live.set(index, self.graph.tasks[index].title)
+        if not self.graph.tasks[index].progress:
+            return ()
+        handle = TaskProgress(self.graph.weights[index], self._on_progress)
+        self._handles[index] = handle
+        return (handle,)
+
+    def _stop(self, index):
+        """Add the weight a task has not yet reported to the progress bar."""
+        handle = self._handles.pop(index, None)
+        if self.reporter.live:
+            self.reporter.live.remove(index)
+        self._advance(
+            self.graph.weights[index] - (handle.completed if handle else 0)
+        )
+
+    def _on_progress(self, handle, delta):
+        """Add progress reported by a running task to the progress bar."""
+        with self._lock:
+            self.pbar.update(delta)
+            self._set_postfix()
+
+    def _advance(self, weight):
+        """Add the weight of resolved tasks to the progress bar."""
+        with self._lock:
+            self.pbar.update(weight)
+            self._set_postfix()
+
+    def _set_postfix(self):
+        """Show the task counts and the throughput of running tasks."""
+        rates = {}
+        for handle in list(self._handles.values()):
+            if handle.rate:
+                rates[handle.unit] = rates.get(handle.unit, 0) + handle.rate
+        self.pbar.set_postfix_str(
+            ", ".join(
+                self._counts
+                + [
+                    tqdm.format_sizeof(rate, "{}/s".format(unit))
+                    for unit, rate in sorted(rates.items())
+                ]
+            ),
+            refresh=False,
+        )
+
+    def next_task(self):
+        """Return the index of the next task to run or None.
+
+        Ready tasks completed by a previous run are skipped silently and ready
+        tasks with an unchanged fingerprint are reported as cached instead of
+        being returned.
+        """
+        for index in iter(self.graph.pop, None):
+            task = self.graph.tasks[index]
+            if task.id in self.resumed:
+                self._record(index, "RESUMED")
+                self._advance(self.graph.weights[index])
+                self.reporter.add(index, None, None)
+                self.graph.complete(index)
+                continue
+            fingerprint = self.cache and self.cache.fingerprint(task)
+            if not fingerprint or not self.cache.hit(task, fingerprint):
+                self._fingerprints[index] = fingerprint
+                return index
+            self._advance(self.graph.weights[index])
+            self.reporter.add(index, task.title, _cached)
+            self.finish(index, True)
+            self._record(index, "CACHED")
+        return None
+
+    def finish(self, index, succeeded):
+        """Record the result of a task that ran.
+
+        Args:
+            index: The index of the task.
+            succeeded: If False, the descendants of the task are skipped and
+                their weight is removed from the progress bar.
+        """
+        fingerprint = self._fingerprints.pop(index, None)
+        started = self._started.pop(index, None)
+        seconds = None if started is None else time.time() - started
+        self._record(index, "OK" if succeeded else "FAILED", seconds)
+        if not succeeded:
+            for skipped in self.graph.fail(index):
+                task = self.graph.tasks[skipped]
+                self._record(skipped, "SKIP")
+                with self._lock:
+                    self.pbar.total -= self.graph.weights[skipped]
+                    self.pbar.refresh()
+                self.reporter.add(skipped, task.title, _skipped)
+            return
+        task = self.graph.tasks[index]
+        if seconds is not None and self.durations:
+            self.durations.observe(task.id, seconds)
+        if fingerprint:
+            self.cache.store(task, fingerprint)
+        if self.journal:
+            self.journal.record(task.id)
+        self.graph.complete(index)
+
+    def _record(self, index, status, seconds=None):
+        """Keep the status of a resolved task if the results are kept."""
+        if self.results is not None:
+            self.results[index] = (status, seconds)
+
+
+def _cached():
+    """Raise a status for a task skipped because its inputs are unchanged."""
+    raise Status("CACHED", Fore.CYAN)
+
+
+def _skipped():
+    """Raise a status for a task skipped because a dependency failed."""
+    raise Status("SKIP", Fore.YELLOW)
+
+
+def _failed(exc):
+    """Return whether a task exception is a failure rather than a status."""
+    return exc is not None and not (isinstance(exc, Status) and not exc.exc)
+
+
+def _get_submit(pool):
+    """Return a function that submits a task to the pool.
+
+    Thread pool tasks are run in the context of the calling thread, or
+    inside a box, in a task of a Multiplexer writing to the box.
+    """
+    if not isinstance(pool, concurrent.futures.ThreadPoolExecutor):
+        return pool.submit
+    return functools.partial(pool.submit, context_runner())
+
+
+def _terminate(pool):
+    """Shut down a pool without waiting for its running tasks."""
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is None:
+        pool.shutdown(wait=False)
+    else:
+        terminate()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Deterministic partitioning of tasks across machines and shard summaries.
+
+Functions:
+    parse_shard: Parse an "i/n" shard specification.
+    partition: Split the tasks of a TaskGraph into balanced shards.
+    write_summary: Append the results of a run to a shard summary file.
+    merge_summaries: Combine shard summary files into one report.
+    main: The console script entry point that prints a merged report.
+"""
+
+import json
+import logging
+import sys
+
+from docopt import docopt
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_USAGE = """
+Usage:
+  rcli-merge [--output <file>] <summary>...
+
+Options:
+  -o, --output <file>  Write the merged summary to the file as JSON.
+"""
+
+_FAILED = ("FAILED", "SKIP", "NOT RUN")  # Statuses that fail a report.
+
+
+def parse_shard(value):
+    """Parse a shard specification.
+
+    Args:
+        value: A string in the form "i/n" or a tuple of (i, n), where i is the
+            one-based index of the shard to run and n is the number of shards.
+
+    Returns:
+        A tuple of (i, n).
+
+    Raises:
+        ValueError: Raised if the specification is malformed or i is not
+            between 1 and n.
+    """
+    try:
+        if isinstance(value, str):
+            value = value.split("/")
+        index, count = (int(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            'Shard must be given as "i/n", not "{}".'.format(value)
+        )
+    if not 1 <= index <= count:
+        raise ValueError(
+            "Shard {} is not between 1 and {}.".format(index, count)
+        )
+    return index, count
+
+
+def partition(graph, count):
+    """Split the tasks of a graph into balanced shards.
+
+    Tasks connected by dependencies are always placed in the same shard.
+    Groups of connected tasks are assigned heaviest first to the lightest
+    shard by their static weights, so the result only depends on the task IDs
+    and weights and is the same on every machine. Recorded durations, which
+    differ between machines, are not used.
+
+    Args:
+        graph: The TaskGraph to split.
+        count: The number of shards.
+
+    Returns:
+        A list of count lists containing the task indexes of each shard in
+        the order given.
+    """
+    groups = sorted(
+        graph.components(),
+        key=lambda group: (
+            -_get_weight(graph, group),
+            graph.tasks[group[0]].id,
+        ),
+    )
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for group in groups:
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        shards[shard].extend(group)
+        loads[shard] += _get_weight(graph, group)
+    return [sorted(shard) for shard in shards]
+
+
+def _get_weight(graph, group):
+    """Return the combined static weight of a group of tasks."""
+    return sum(graph.tasks[i].weight for i in group)
+
+
+def write_summary(path, header, shard, results):
+    """Append the results of a run to a summary file.
+
+    Each run is written as one line of JSON so that a command may call
+    run_tasks several times with the same summary file.
+
+    Args:
+        path: The path of the summary file.
+        header: The header of the run.
+        shard: The (i, n) shard of the run, or None.
+        results: A list of dictionaries with the id, title, status and
+            seconds of each task in the shard.
+    """
+    with open(path, "a") as summary_file:
+        summary_file.write(
+            json.dumps(
+                {
+                    "header": header,
+                    "shard": list(shard or (1, 1)),
+                    "tasks": results,
+                }
+            )
+            + "\n"
+        )
+
+
+def merge_summaries(paths):
+    """Combine the runs in shard summary files.
+
+    Args:
+        paths: The paths of the summary files written by each shard.
+
+    Returns:
+        A list of merged runs in the order their headers were first seen.
+        Each run is a dictionary with the header, the number of shards, the
+        shards that did not report, and the tasks of every shard.
+    """
+    runs = {}
+    for path in paths:
+        with open(path) as summary_file:
+            for line in summary_file:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                index, count = data["shard"]
+                run = runs.setdefault(
+                    data["header"],
+                    {"header": data["header"], "shards": count, "seen": set()},
+                )
+                if run["shards"] != count:
+                    raise ValueError(
+                        'Run "{}" was split into {} and {} shards.'.format(
+                            data["header"], run["shards"], count
+                        )
+                    )
+                run["seen"].add(index)
+                run.setdefault("tasks", []).extend(data["tasks"])
+    merged = []
+    for run in runs.values():
+        seen = run.pop("seen")
+        run["missing"] = [
+            i for i in range(1, run["shards"] + 1) if i not in seen
+        ]
+        run["tasks"].sort(key=lambda task: task["id"])
+        merged.append(run)
+    return merged
+
+
+def main(argv=None):
+    """Print a report of merged shard summaries.
+
+    Args:
+        argv: The command line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        A non-zero exit status if a task failed or was skipped, or if a shard
+        did not report.
+    """
+    args = docopt(_USAGE, argv=argv)
+    runs = merge_summaries(args["<summary>"])
+    if args["--output"]:
+        with open(args["--output"], "w") as output_file:
+            json.dump(runs, output_file, indent=2)
+    failed = False
+    for run in runs:
+        counts = {}
+        for task in run["tasks"]:
+            counts[task["status"]] = counts.get(task["status"], 0) + 1
+        print(
+            "{}: {}".format(
+                run["header"],
+                ", ".join(
+                    "{} {}".format(n, status)
+                    for status, n in sorted(counts.items())
+                ),
+            )
+        )
+        for task in run["tasks"]:
+            if task["status"] in _FAILED:
+                print("  [{status}] {title}".format(**task))
+        if run["missing"]:
+            print(
+                "  Missing shards: {}".format(
+                    ", ".join(str(i) for i in run["missing"])
+                )
+            )
+        failed = failed or bool(
+            run["missing"]
+            or any(task["status"] in _FAILED for task in run["tasks"])
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
-import copy
+import contextvars
+import functools
 import typing
 
 import colorama
 
+from . import terminal
+
+
+_stack = contextvars.ContextVar("style_stack", default=())
+
 
 class Alignment:
     LEFT = 0
@@ -28,6 +34,8 @@ class Color:
 
 class _Reset:
     def __str__(self):
+        if terminal.is_plain():
+            return ""
         return str(colorama.Style.RESET_ALL)
 
     def __enter__(self):
@@ -43,12 +51,55 @@ class _Reset:
         return s + str(self)
 
 
+_MAX_INTERNED = 4096  # The number of styles kept before they are dropped.
+
+_FLAGS = (  # The name of each style flag and its on and off SGR codes.
+    ("bold", 1, 21),
+    ("dim", 2, 22),
+    ("italic", 3, 23),
+    ("underlined", 4, 24),
+    ("blink", 5, 25),
+    ("reverse", 7, 27),
+    ("hidden", 8, 28),
+)
+
+
+class _Flag:
+    def __init__(self, name):
+        self._name = name
+        self._slot = f"_{name}"
+        self._preset = None
+
+    def __get__(self, obj, cls=None):
+        if obj is not None:
+            return getattr(obj, self._slot)
+        if self._preset is None:
+            self._preset = cls(**{self._name: True})
+        return self._preset
+
+    def __set__(self, obj, value):
+        raise AttributeError("Style objects are immutable")
+
+
 class Style:
+    __slots__ = (
+        "foreground",
+        "background",
+        "_reset",
+        "_sgr",
+    ) + tuple(f"_{name}" for name, _, _ in _FLAGS)
     reset = _Reset()
-    __stack = []
-
-    def __init__(
-        self,
+    bold = _Flag("bold")
+    dim = _Flag("dim")
+    italic = _Flag("italic")
+    underlined = _Flag("underlined")
+    blink = _Flag("blink")
+    reverse = _Flag("reverse")
+    hidden = _Flag("hidden")
+    __interned = {}
+
+    def __new__(
+        cls,
         foreground: typing.Union[Color, str, int] = None,
         background: typing.Union[Color, str, int] = None,
         bold: bool = None,
@@ -60,50 +111,88 @@ class Style:
         hidden: bool = None,
         reset: bool = True,
     ):
-        self.foreground = str(foreground) if foreground else None
-        self.background = str(background) if background else None
+        fg = str(foreground) if foreground else None
+        bg = str(background) if background else None
         if hasattr(background, "background"):
-            self.background = background.background()
+            bg = background.background()
         if str(foreground).startswith("\033["):
-            self.foreground = str(foreground).strip("\033[m")
+            fg = str(foreground).strip("\033[m")
         if str(background).startswith("\033["):
-            self.background = str(background).strip("\033[m")
-        self.bold = bold
-        self.dim = dim
-        self.italic = italic
-        self.underlined = underlined
-        self.blink = blink
-        self.reverse = reverse
-        self.hidden = hidden
-        self._reset = reset
+            bg = str(background).strip("\033[m")
+        key = (
+            fg,
+            bg,
+            (bold, dim, italic, underlined, blink, reverse, hidden),
+            reset,
+        )
+        style = cls.__interned.get(key)
+        if style is None:
+            if len(cls.__interned) >= _MAX_INTERNED:
+                cls.__interned.clear()
+            style = cls.__interned[key] = cls._create(*key)
+        return style
 
-    def __str__(self):
-        value = "{}{}{}{}{}{}{}{}{}{}{}".format(
-            colorama.Style.RESET_ALL if self._reset else "",
-            colorama.ansi.CSI,
-            self._value(self.foreground, None, "foreground"),
-            self._value(self.background, None, "background",),
-            self._value(1, 21, "bold"),
-            self._value(2, 22, "dim"),
-            self._value(3, 23, "italic"),
-            self._value(4, 24, "underlined"),
-            self._value(5, 25, "blink"),
-            self._value(7, 27, "reverse"),
-            self._value(8, 28, "hidden"),
+    @classmethod
+    def _create(cls, foreground, background, flags, reset):
+        style = object.__new__(cls)
+        values = {"foreground": foreground, "background": background}
+        values.update(
+            (f"_{name}", value) for (name, _, _), value in zip(_FLAGS, flags)
+        )
+        values["_reset"] = reset
+        codes = [c for c in (foreground, background) if c is not None]
+        for (_, on, off), value in zip(_FLAGS, flags):
+            if value is False:
+                codes.append(str(off))
+            elif value is not None:
+                codes.append(str(on))
+        prefix = colorama.Style.RESET_ALL if reset else ""
+        values["_sgr"] = (
+            f"{prefix}{colorama.ansi.CSI}{';'.join(codes)}m"
+            if codes
+            else prefix
         )
-        return f"{value[:-1]}m"
+        for slot, value in values.items():
+            object.__setattr__(style, slot, value)
+        return style
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Style objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Style objects are immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (
+            Style,
+            (
+                self.foreground,
+                self.background,
+                self._bold,
+                self._italic,
+                self._dim,
+                self._underlined,
+                self._blink,
+                self._reverse,
+                self._hidden,
+                self._reset,
+            ),
+        )
+
+    def __str__(self):
+        if terminal.is_plain():
+            return ""
+        return self._sgr
 
     def __repr__(self):
         return str(list(str(self)))
 
-    def _value(self, on, off, param):
-        value = getattr(self, param, None)
-        if value is False and off is not None:
-            return f"{off};"
-        if value is not None and on is not None:
-            return f"{on};"
-        return ""
-
     def __add__(self, s):
         return str(self) + s
 
@@ -114,36 +203,47 @@ class Style:
         return f"{self.reset}{self.full_style(self)}{s}{self.current()}"
 
     def __enter__(self):
-        self.__stack.append(self.full_style(self))
+        _stack.set(_stack.get() + (self.full_style(self),))
         print(self.current(), end="")
 
     def __exit__(self, *args, **kwargs):
-        self.__stack.pop()
+        _stack.set(_stack.get()[:-1])
         print(self.current(), end="")
 
     @classmethod
     def full_style(cls, style):
-        full_style = copy.deepcopy(style)
-        if cls.__stack:
-            current = cls.current()
-            for attr in vars(full_style):
-                if getattr(full_style, attr, None) is None:
-                    setattr(full_style, attr, getattr(current, attr, None))
-        return full_style
+        if _stack.get():
+            return _merge(cls.current(), style)
+        return style
 
     @classmethod
     def current(cls):
-        return cls.__stack[-1] if cls.__stack else cls.reset
+        stack = _stack.get()
+        return stack[-1] if stack else cls.reset
+
+
+@functools.lru_cache(maxsize=1024)
+def _merge(parent, child):
+    def pick(slot):
+        value = getattr(child, slot)
+        return getattr(parent, slot) if value is None else value
+
+    return Style(
+        pick("foreground"),
+        pick("background"),
+        pick("_bold"),
+        pick("_italic"),
+        pick("_dim"),
+        pick("_underlined"),
+        pick("_blink"),
+        pick("_reverse"),
+        pick("_hidden"),
+        child._reset,
+    )
 
 
 Style.default = Style.reset
-Style.bold = bright = Style(bold=True)
-Style.dim = Style(dim=True)
-Style.italic = Style(italic=True)
-Style.underlined = Style(underlined=True)
-Style.blink = Style(blink=True)
-Style.reverse = Style(reverse=True)
-Style.hidden = Style(hidden=True)
+bright = Style.bold
 
 
 def styled(text, *args, **kwargs):
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Tables whose rows are formatted and written as they are read.
+
+Classes:
+    Table: Aligns the cells of rows in columns whose widths are declared or
+        measured from the first rows, and formats the rows one at a time.
+
+Functions:
+    table: Print the rows of an iterable as a table.
+"""
+
+import collections
+import itertools
+import operator
+import re
+import sys
+
+from .io import columns as _columns
+from .style import Alignment
+from .width import truncate, width
+from .wrap import wrap
+
+
+_SAMPLE = 100  # The default number of rows measured to size the columns.
+_SEP = "  "  # The default text between two columns.
+_RULE = "─"  # The character of the line below the headers.
+_SLOW = re.compile(r"[^\x20-\x7e]")  # Characters that are not one column.
+_Layout = collections.namedtuple("_Layout", "widths formats template")
+_ALIGN = {Alignment.LEFT: "<", Alignment.CENTER: "^", Alignment.RIGHT: ">"}
+
+
+class Table(object):
+    """Rows of cells aligned in columns.
+
+    Columns without a declared width are as wide as their widest cell among
+    the headers and the first sample rows. If the columns do not fit in the
+    available space, the widest measured columns are narrowed until they
+    do. Declared widths are never changed.
+
+    Rows are read lazily after the sample, so an iterator of any length is
+    formatted with constant memory. Cells wider than their column are cut,
+    or wrapped onto more lines if wrap is True. Missing cells are blank and
+    cells beyond the last column are ignored.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        headers=None,
+        widths=None,
+        align=None,
+        sample=_SAMPLE,
+        wrap=False,  # pylint: disable=redefined-outer-name
+        sep=_SEP,
+        header_style=None,
+        columns=None,
+    ):
+        """Initialize the table.
+
+        Args:
+            headers: The title of each column, or None for no header line.
+            widths: The width of each column in terminal columns. A width
+                of None is measured from the sample rows.
+            align: The Alignment of each column. Defaults to LEFT.
+            sample: The number of rows read ahead to measure the columns.
+            wrap: Whether cells wider than their column are wrapped onto
+                more lines instead of cut.
+            sep: The text written between two columns.
+            header_style: A Style applied to the headers.
+            columns: The number of terminal columns a line may take.
+                Defaults to one less than the width inside the current
+                box, or than the width of the terminal outside of a box.
+        """
+        self.headers = list(headers) if headers is not None else None
+        self.widths = list(widths) if widths is not None else None
+        self.align = list(align) if align is not None else None
+        self.sample = sample
+        self.wrap = wrap
+        self.sep = sep
+        self.header_style = header_style
+        self.columns = columns
+
+    def lines(self, rows):
+        """Format the rows of a table.
+
+        Args:
+            rows: An iterable of rows, each of which is a sequence of cells.
+                Cells are converted with str, except that None is blank.
+
+        Yields:
+            Each line of the table without a line break.
+        """
+        rows = iter(rows)
+        sample = []
+        if self.widths is None or None in self.widths:
+            sample = [
+                _texts(row) for row in itertools.islice(rows, self.sample)
+            ]
+        layout = self._get_layout(self._fit(sample))
+        if self.headers is not None:
+            headers = _texts(self.headers)
+            if self.header_style:
+                headers = [self.header_style(h) for h in headers]
+            yield from self._format(headers, layout)
+            yield self.sep.join(_RULE * w for w in layout.widths)
+        for row in sample:
+            yield from self._format(row, layout)
+        for row in rows:
+            yield from self._format(_texts(row), layout)
+
+    def print(self, rows, file=None):
+        """Write the lines of a table as they are formatted.
+
+        Args:
+            rows: An iterable of rows, each of which is a sequence of cells.
+            file: The stream to write. Defaults to sys.stdout.
+        """
+        write = (file or sys.stdout).write
+        for line in self.lines(rows):
+            write(f"{line}\n")
+
+    def _fit(self, sample):
+        """Get the width of each column."""
+        declared = list(self.widths or ())
+        count = max(
+            itertools.chain(
+                [len(declared), len(self.headers or ())], map(len, sample)
+            )
+        )
+        declared += [None] * (count - len(declared))
+        measured = [0] * count
+        for row in itertools.chain([_texts(self.headers or ())], sample):
+            for i, cell in enumerate(row[:count]):
+                measured[i] = max(measured[i], width(cell))
+        measured = [max(m, 1) for m in measured]
+        available = (self.columns or _columns() - 1) - width(self.sep) * max(
+            count - 1, 0
+        )
+        available -= sum(w for w in declared if w is not None)
+        cap = _get_cap(
+            [m for m, d in zip(measured, declared) if d is None], available
+        )
+        return [
+            min(m, cap) if d is None else d for m, d in zip(measured, declared)
+        ]
+
+    def _get_layout(self, widths):
+        """Get the formats of the columns and a template for whole rows.
+
+        The format of a column is its width, its alignment and whether it
+        is the last column and left aligned, so it is not padded. The
+        template pads and cuts cells of one column per character.
+        """
+        align = list(self.align or ())
+        align += [Alignment.LEFT] * (len(widths) - len(align))
+        last = len(widths) - 1
+        formats = [
+            (w, a, i == last and a == Alignment.LEFT)
+            for i, (w, a) in enumerate(zip(widths, align))
+        ]
+        sep = self.sep.replace("{", "{{").replace("}", "}}")
+        template = sep.join(
+            f"{{:.{w}}}" if last else f"{{:{_ALIGN[a]}{w}.{w}}}"
+            for w, a, last in formats
+        )
+        return _Layout(widths, formats, template)
+
+    def _format(self, cells, layout):
+        """Yield the lines of a row of cell texts.
+
+        Rows of printable ASCII are formatted by the template unless a cell
+        needs to be wrapped.
+        """
+        widths, formats, template = layout
+        if len(cells) != len(widths):
+            cells = cells[: len(widths)]
+            cells += [""] * (len(widths) - len(cells))
+        if not _SLOW.search("".join(cells)) and (
+            not self.wrap or all(map(operator.le, map(len, cells), widths))
+        ):
+            yield template.format(*cells)
+            return
+        sizes = [width(c) for c in cells]
+        if all(s <= f[0] for s, f in zip(sizes, formats)):
+            yield self.sep.join(map(_pad, cells, sizes, formats))
+            return
+        if not self.wrap:
+            yield self.sep.join(
+                map(_pad, *_cut(cells, sizes, formats), formats)
+            )
+            return
+        columns = [
+            list(wrap(c, f[0])) or [""] if s > f[0] else [c]
+            for c, s, f in zip(cells, sizes, formats)
+        ]
+        for line in itertools.zip_longest(*columns, fillvalue=""):
+            line = list(line)
+            yield self.sep.join(
+                map(_pad, line, [width(c) for c in line], formats)
+            )
+
+
+def table(rows, headers=None, **kwargs):
+    """Print the rows of an iterable as a table.
+
+    Args:
+        rows: An iterable of rows, each of which is a sequence of cells.
+        headers: The title of each column, or None for no header line.
+        kwargs: The other arguments of Table.
+    """
+    Table(headers, **kwargs).print(rows)
+
+
+def _texts(row):
+    """Convert the cells of a row to strings."""
+    return ["" if cell is None else str(cell) for cell in row]
+
+
+def _cut(cells, sizes, formats):
+    """Cut cells to the width of their columns."""
+    cut_cells = []
+    cut_sizes = []
+    for cell, size, (columns, _, _) in zip(cells, sizes, formats):
+        if size > columns:
+            cell = truncate(cell, columns)
+            size = width(cell)
+        cut_cells.append(cell)
+        cut_sizes.append(size)
+    return cut_cells, cut_sizes
+
+
+def _pad(cell, size, column_format):
+    """Pad a cell to the width of its column."""
+    columns, align, last = column_format
+    padding = columns - size
+    if padding <= 0 or last:
+        return cell
+    if align == Alignment.RIGHT:
+        return f"{' ' * padding}{cell}"
+    if align == Alignment.CENTER:
+        left = padding // 2
+        return f"{' ' * left}{cell}{' ' * (padding - left)}"
+    return f"{cell}{' ' * padding}"
+
+
+def _get_cap(widths, available):
+    """Get the largest width that fits the columns in the space available.
+
+    Returns:
+        The width to which the widest columns are narrowed, which is at
+        least one.
+    """
+    if sum(widths) <= available:
+        return max(widths, default=1)
+    low, high = 1, max(widths)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(min(w, cap) for w in widths) <= available:
+            low = cap
+        else:
+            high = cap - 1
+    return low
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""Task definitions and dependency graphs for run_tasks.
+
+Classes:
+    Task: A titled callable with a progress weight, a stable ID and the IDs
+        of the tasks that must complete before it can run.
+    TaskGraph: Tracks which tasks of a dependency graph are ready to run,
+        prioritizing the tasks on the longest remaining path.
+    TaskStream: Reads independent tasks lazily from an iterable, keeping only
+        the tasks that have not finished in memory.
+"""
+
+import heapq
+
+
+class Task(object):
+    """A unit of work that can be passed to run_tasks."""
+
+    def __init__(
+        self,
+        title,
+        func,
+        weight=1,
+        id_=None,
+        requires=(),
+        inputs=(),
+        outputs=(),
+        params=None,
+        resources=None,
+        progress=False,
+    ):
+        """Initialize the task.
+
+        Args:
+            title: The message displayed while the task runs.
+            func: A callable that takes no arguments.
+            weight: The amount of progress the task represents.
+            id_: A stable identifier for the task. Defaults to the title.
+            requires: The IDs of, or the Task objects for, the tasks that must
+                complete successfully before this task can run.
+            inputs: The paths of the files the task reads. Tasks that declare
+                inputs, outputs or params are skipped if none of them changed
+                since the task last completed successfully.
+            outputs: The paths of the files the task writes.
+            params: A JSON serializable value describing any other
+                parameters that affect the result of the task.
+            resources: A dictionary mapping resource names, such as "cpu",
+                "memory" or "io", to the amount the task holds while it runs.
+                Concurrent runs with a resource budget only start the task
+                once its costs fit within the budget.
+            progress: If True, func is called with a TaskProgress that it
+                may use to report its own progress while it runs.
+        """
+        self.title = title
+        self.func = func
+        self.weight = weight
+        self.id = id_
+        self.requires = tuple(requires)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.params = params
+        self.resources = dict(resources or {})
+        self.progress = progress
+
+    @classmethod
+    def create(cls, task):
+        """Return a Task from a Task or a (title, func[, weight]) tuple.
+
+        Args:
+            task: A Task object or a tuple containing a task title, a callable,
+                and optionally a weight.
+
+        Returns:
+            The Task object.
+        """
+        if isinstance(task, Task):
+            return task
+        return cls(*task)
+
+    def __repr__(self):
+        """Return a debug representation of the task."""
+        return "Task({!r}, weight={!r}, id_={!r}, requires={!r})".format(
+            self.title, self.weight, self.id, self.requires
+        )
+
+
+class TaskGraph(object):
+    """A dependency graph of tasks that yields tasks as they become ready."""
+
+    def __init__(self, tasks, critical_path=True, weights=None):
+        """Build the graph.
+
+        Tasks without an explicit ID use their title as their ID. Duplicate
+        IDs are made unique by appending "#2", "#3", and so on.
+
+        Args:
+            tasks: An iterable of Task objects or task tuples.
+            critical_path: If True, ready tasks with the greatest weight left
+                on their longest path to the end of the graph are returned
+                first. Otherwise, ready tasks are returned in the order given.
+            weights: A function that takes the list of tasks and returns the
+                weight of each one, such as their expected durations in
+                seconds. Defaults to the static weights of the tasks.
+
+        Raises:
+            ValueError: Raised if a task requires an unknown task or the
+                dependencies contain a cycle.
+        """
+        self.tasks = [Task.create(t) for t in tasks]
+        self._assign_ids()
+        self.weights = (weights and weights(self.tasks)) or [
+            task.weight for task in self.tasks
+        ]
+        index = {task.id: i for i, task in enumerate(self.tasks)}
+        self._children = [[] for _ in self.tasks]
+        self._waiting = [len(task.requires) for task in self.tasks]
+        for i, task in enumerate(self.tasks):
+            for dependency in task.requires:
+                if isinstance(dependency, Task):
+                    dependency = dependency.id
+                if dependency not in index:
+                    raise ValueError(
+                        'Task "{}" requires unknown task "{}".'.format(
+                            task.id, dependency
+                        )
+                    )
+                self._children[index[dependency]].append(i)
+        self.critical_paths = self._get_critical_paths()
+        self._critical_path = critical_path
+        self._resolved = [False] * len(self.tasks)
+        self._ready = []
+        for i, waiting in enumerate(self._waiting):
+            if not waiting:
+                self._push(i)
+
+    @property
+    def total_weight(self):
+        """The combined weight of every task in the graph."""
+        return sum(self.weights)
+
+    @property
+    def queued(self):
+        """The number of tasks that are ready and have not been returned."""
+        return len(self._ready)
+
+    def components(self):
+        """Return the groups of tasks connected by their dependencies.
+
+        Returns:
+            A list of groups ordered by their first task. Each group is a
+            sorted list of task indexes.
+        """
+        neighbors = [set(children) for children in self._children]
+        for i, children in enumerate(self._children):
+            for child in children:
+                neighbors[child].add(i)
+        seen = set()
+        groups = []
+        for i in range(len(self.tasks)):
+            if i in seen:
+                continue
+            seen.add(i)
+            group = [i]
+            for j in group:
+                for k in neighbors[j] - seen:
+                    seen.add(k)
+                    group.append(k)
+            groups.append(sorted(group))
+        return groups
+
+    def pop(self):
+        """Return the index of the next ready task or None if there is none."""
+        if not self._ready:
+            return None
+        return heapq.heappop(self._ready)[1]
+
+    def complete(self, index):
+        """Mark a task as completed and make its dependents ready if possible.
+
+        Args:
+            index: The index of the completed task.
+        """
+        self._resolved[index] = True
+        for child in self._children[index]:
+            self._waiting[child] -= 1
+            if not self._waiting[child] and not self._resolved[child]:
+                self._push(child)
+
+    def fail(self, index):
+        """Mark a task as failed and skip every task that depends on it.
+
+        Args:
+            index: The index of the failed task.
+
+        Returns:
+            The indexes of the newly skipped descendants in the order given.
+        """
+        self._resolved[index] = True
+        skipped = []
+        stack = list(self._children[index])
+        while stack:
+            child = stack.pop()
+            if not self._resolved[child]:
+                self._resolved[child] = True
+                skipped.append(child)
+                stack.extend(self._children[child])
+        return sorted(skipped)
+
+    def _push(self, index):
+        """Add a ready task to the priority queue."""
+        key = -self.critical_paths[index] if self._critical_path else 0
+        heapq.heappush(self._ready, (key, index))
+
+    def _assign_ids(self):
+        """Give every task a unique ID."""
+        counts = {}
+        for task in self.tasks:
+            task_id = task.title if task.id is None else task.id
+            counts[task_id] = counts.get(task_id, 0) + 1
+            if counts[task_id] > 1:
+                task_id = "{}#{}".format(task_id, counts[task_id])
+            task.id = task_id
+
+    def _get_critical_paths(self):
+        """Return the weight of the heaviest path starting at each task.
+
+        Raises:
+            ValueError: Raised if the dependencies contain a cycle.
+        """
+        waiting = list(self._waiting)
+        order = [i for i, count in enumerate(waiting) if not count]
+        for i in order:
+            for child in self._children[i]:
+                waiting[child] -= 1
+                if not waiting[child]:
+                    order.append(child)
+        if len(order) < len(self.tasks):
+            cycle = (t.id for i, t in enumerate(self.tasks) if waiting[i])
+            raise ValueError(
+                "Task dependencies contain a cycle: {}".format(
+                    ", ".join(cycle)
+                )
+            )
+        paths = [0] * len(self.tasks)
+        for i in reversed(order):
+            paths[i] = self.weights[i] + max(
+                [paths[c] for c in self._children[i]] or [0]
+            )
+        return paths
+
+
+class TaskStream(object):
+    """Independent tasks read lazily from an iterable of unknown length.
+
+    A stream provides the same interface as a TaskGraph to the task runner,
+    but only keeps the tasks that have been returned by pop and have not been
+    completed or failed. The number of tasks in memory is therefore bounded by
+    the number of tasks running at once.
+    """
+
+    def __init__(self, tasks, total=None, shard=None):
+        """Initialize the stream.
+
+        Args:
+            tasks: An iterable of Task objects or task tuples. Streamed tasks
+                may not require other tasks. Tasks without an explicit ID use
+                their title as their ID.
+            total: The estimated combined weight of the tasks, or None if it
+                is unknown.
+            shard: A tuple of (i, n). If given, only every n-th task starting
+                with the i-th is returned.
+        """
+        self.tasks = {}
+        self.weights = {}
+        self.total_weight = total
+        self.queued = None
+        self._iterator = iter(tasks)
+        self._shard = shard
+        self._position = 0
+
+    def pop(self):
+        """Return the index of the next task or None if there are no more.
+
+        Raises:
+            ValueError: Raised if the task requires another task.
+        """
+        for task in self._iterator:
+            index = self._position
+            self._position += 1
+            if self._shard and index % self._shard[1] != self._shard[0] - 1:
+                continue
+            task = Task.create(task)
+            if task.requires:
+                raise ValueError(
+                    'Streamed task "{}" may not require other tasks.'.format(
+                        task.title
+                    )
+                )
+            if task.id is None:
+                task.id = task.title
+            self.tasks[index] = task
+            self.weights[index] = task.weight
+            return index
+        return None
+
+    def complete(self, index):
+        """Forget a completed task.
+
+        Args:
+            index: The index of the completed task.
+        """
+        del self.tasks[index]
+        del self.weights[index]
+
+    def fail(self, index):
+        """Forget a failed task.
+
+        Args:
+            index: The index of the failed task.
+
+        Returns:
+            An empty list, as streamed tasks have no dependents.
+        """
+        self.complete(index)
+        return []
@@ -1,3 +1,6 @@
+import signal
+import threading
+
 from ..backports.get_terminal_size import get_terminal_size
 
 
@@ -8,3 +11,72 @@ def cols():
         The current number of columns in the terminal or 80 if there is no tty.
     """
     return get_terminal_size().columns or 80
+
+
+_resizes = 0
+_handler = None
+
+
+def width_key():
+    """Get a value that changes whenever the terminal may have been resized.
+
+    Where the resize signal is available, the first call from the main
+    thread installs a handler that counts resizes, and the key is the count
+    for as long as that handler stays installed. Elsewhere, or once the
+    application replaces the handler, the key is the current number of
+    columns.
+
+    Returns:
+        A hashable value that is equal for calls between which the number of
+        columns did not change.
+    """
+    if _handler is None:
+        _watch_resizes()
+    if _handler and signal.getsignal(signal.SIGWINCH) is _handler:
+        return "resizes", _resizes
+    return "cols", cols()
+
+
+def _watch_resizes():
+    """Count resize signals, calling any handler installed before."""
+    global _handler  # pylint: disable=global-statement
+    if (
+        not hasattr(signal, "SIGWINCH")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        return
+    previous = signal.getsignal(signal.SIGWINCH)
+
+    def on_resize(signum, frame):
+        global _resizes  # pylint: disable=global-statement
+        _resizes += 1
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGWINCH, on_resize)
+    _handler = on_resize
+
+
+_plain = False
+
+
+def is_plain():
+    """Get whether output is written for a pipe instead of a terminal.
+
+    Returns:
+        True if styles and boxes should not write escape codes and output
+        should only be flushed when the stream is closed or flushed
+        explicitly.
+    """
+    return _plain
+
+
+def set_plain(plain=True):
+    """Set whether output is written for a pipe instead of a terminal.
+
+    Args:
+        plain: If True, styles and boxes write no escape codes and display
+            functions stop flushing the output after every line.
+    """
+    global _plain  # pylint: disable=global-statement
+    _plain = plain
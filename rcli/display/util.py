@@ -1,22 +1,12 @@
-import re
+import unicodedata
 
-import colorama
+from .width import strip_ansi, truncate, width  # noqa: F401
 
-
-_INVISIBLE_UNICODE = re.compile("\\[\u00BF-\uFFFF\\]")
-
-
-def visible_len(s):
-    return len(remove_invisible_characters(s))
-
-
-def remove_invisible_characters(s):
-    return remove_control_characters(remove_ansi_codes(s))
+visible_len = width
+remove_invisible_characters = remove_ansi_codes = strip_ansi
 
 
 def remove_control_characters(s):
-    return re.sub(_INVISIBLE_UNICODE, "", s)
-
-
-def remove_ansi_codes(s):
-    return re.sub(colorama.ansitowin32.AnsiToWin32.ANSI_CSI_RE, "", s)
+    if s.isprintable():
+        return s
+    return "".join(c for c in s if unicodedata.category(c) not in ("Cc", "Cf"))
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""Word wrapping of styled text measured in terminal columns.
+
+Functions:
+    wrap: Wrap text to a number of columns, keeping its style on every line.
+"""
+
+import re
+
+from .width import char_width, width
+
+
+_TOKEN = re.compile(r"\s+|(?:\x1b\[[0-?]*[ -/]*[@-~]|[^\s\x1b]|\x1b)+")
+_PIECE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|.", re.S)
+_SGR = re.compile(r"\x1b\[([0-9;]*)m")
+_SLOW = re.compile(r"[^\x20-\x7e]")  # Characters that are not one column.
+_WORD = re.compile(r"[^ ]")
+_RESET = "\x1b[0m"
+
+
+def wrap(text, columns):
+    """Wrap text to a number of columns, keeping its style on every line.
+
+    Lines are broken at whitespace, which is dropped at the end of every line
+    and at the start of every line but the first. Words wider than a line
+    are broken where the line ends. Escape sequences take no columns. A line
+    that ends while a style is active is reset at its end, and the style is
+    applied again at the start of the next line.
+
+    For text without escape sequences, tabs or hyphenated words the lines are
+    those of textwrap.wrap. Unlike textwrap, words are never broken at
+    hyphens and every whitespace character becomes one space.
+
+    Printable ASCII text is wrapped a line at a time instead of a word at a
+    time, which makes long paragraphs faster to wrap than with textwrap.
+
+    Args:
+        text: The text to wrap, or an iterable of pieces of it. Pieces are
+            read as the lines are consumed, so only the current line and
+            the current word are kept in memory.
+        columns: The maximum number of columns of a line.
+
+    Yields:
+        Each line of the wrapped text without a line break.
+    """
+    wrapper = _Wrapper(columns)
+    rest = ""
+    for piece in (text,) if isinstance(text, str) else text:
+        rest += piece
+        if wrapper.is_fast(rest):
+            rest = yield from wrapper.add_text(rest)
+            continue
+        end = 0
+        for match in _TOKEN.finditer(rest):
+            if match.end() == len(rest):
+                break
+            yield from wrapper.add(match.group())
+            end = match.end()
+        rest = rest[end:]
+    if wrapper.is_fast(rest):
+        yield from wrapper.add_text(rest, True)
+    else:
+        for match in _TOKEN.finditer(rest):
+            yield from wrapper.add(match.group())
+    yield from wrapper.end()
+
+
+class _Wrapper(object):
+    """The line being filled while text is wrapped."""
+
+    def __init__(self, columns):
+        """Initialize an empty first line."""
+        self._columns = columns
+        self._line = []
+        self._used = 0
+        self._started = False
+        self._active = []
+        self._prefix = ""
+
+    def is_fast(self, text):
+        """Return whether text can be wrapped a line at a time."""
+        return (
+            self._columns > 0
+            and not self._line
+            and not self._active
+            and not _SLOW.search(text)
+            and (self._started or text[:1] != " ")
+        )
+
+    def add_text(self, text, final=False):
+        """Wrap printable ASCII text that starts a line.
+
+        Args:
+            text: The text to wrap.
+            final: Whether the text ends the input.
+
+        Yields:
+            Each finished line.
+
+        Returns:
+            The end of the text that may continue in the next piece.
+        """
+        columns = self._columns
+        start = 0
+        while True:
+            if self._started:
+                match = _WORD.search(text, start)
+                start = match.start() if match else len(text)
+            end = start + columns
+            if end >= len(text):
+                if not final:
+                    return text[start:]
+                line = text[start:].rstrip(" ")
+                if line:
+                    yield line
+                return ""
+            if text[end] == " ":
+                line = text[start:end].rstrip(" ")
+                start = end
+            else:
+                word_start = max(text.rfind(" ", start, end) + 1, start)
+                word_end = text.find(" ", end)
+                if word_end < 0:
+                    word_end = len(text)
+                    if not final and word_end - word_start <= columns:
+                        return text[start:]
+                if word_end - word_start > columns:
+                    line = text[start:end]
+                    start = end
+                else:
+                    line = text[start:word_start].rstrip(" ")
+                    start = word_start
+            yield line
+            self._started = True
+
+    def add(self, token):
+        """Add a word or a run of whitespace.
+
+        Yields:
+            Each finished line.
+        """
+        if token[0].isspace():
+            token = " " * len(token)
+        columns = self._columns
+        size = width(token)
+        while token and (self._used or not self._started or token[0] != " "):
+            if self._used + size <= columns:
+                self._line.append(token)
+                self._used += size
+                _update_style(self._active, token)
+                return
+            if size > columns:
+                head, token = _split(
+                    token,
+                    columns - self._used if columns > 0 else 1,
+                    not self._used,
+                )
+                self._line.append(head)
+                _update_style(self._active, head)
+                size = width(token)
+            yield from self.end()
+            self._prefix = "".join(self._active)
+            self._line = []
+            self._used = 0
+
+    def end(self):
+        """Yield the current line without trailing whitespace unless empty."""
+        line = self._line
+        if line and not line[-1].strip():
+            line.pop()
+        if line:
+            yield "{}{}{}".format(
+                self._prefix, "".join(line), _RESET if self._active else ""
+            )
+            self._started = True
+
+
+def _split(token, columns, force):
+    """Split a word after a number of columns.
+
+    If force is True, the first character is kept even if it is too wide.
+    """
+    used = 0
+    for match in _PIECE.finditer(token):
+        piece = match.group()
+        if len(piece) == 1:
+            used += char_width(piece)
+            if used > columns and (match.start() or not force):
+                return token[: match.start()], token[match.start() :]
+    return token, ""
+
+
+def _update_style(active, token):
+    """Track the SGR codes in effect after a token is written."""
+    if "\x1b" not in token:
+        return
+    for match in _SGR.finditer(token):
+        if match.group(1) in ("", "0"):
+            active.clear()
+        else:
+            active.append(match.group())
@@ -3,19 +3,38 @@
 
 Functions:
     write_logfile: Write the current contents of the DEBUG log to a file.
+    configure_logfile: Set the directory, compression, size cap and
+        retention used when writing log files.
+    get_logfile_settings: Read the log file settings from the rcli
+        configuration and the environment.
     handle_unexpected_exception: Log and append the exception message with a
         message indicating that logging occurred.
     enable_logging: Configures logging handlers and formatters.
+    get_capture_settings: Read the crash log capture settings from the rcli
+        configuration and the environment.
+    flush: Wait for all queued log records to be handled.
     get_log_level: Parse a docopt dictionary of parsed values to retrieve the
         log level passed in by the user on the command line.
 """
 
 from io import open  # pylint: disable=redefined-builtin
+import atexit
+import copy
 import datetime
+import glob
+import gzip
+import io
+import json
 import logging
+import logging.handlers
+import os
 import os.path
+import queue
+import re
 import signal
 import sys
+import threading
+import time
 import typing  # noqa: F401 pylint: disable=unused-import
 
 import colorama
@@ -23,32 +42,192 @@ import six
 
 from . import exceptions
 
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
 
-_LOGFILE_STREAM = six.StringIO()
 _LOGGER = logging.getLogger(__name__)
+_LOGFILE_FORMAT = "%(levelname)s [%(asctime)s][%(name)s] %(message)s"
+_LOGFILE_TEMPLATE = "{} [{},{:03d}][{}] {}"  # _LOGFILE_FORMAT for str.format.
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # The format of asctime without msecs.
+_TRACEBACK_FORMATTER = logging.Formatter()
+_FLUSH_TIMEOUT = 5  # Seconds to wait for queued records during shutdown.
+_LEVEL_NAMES = ("DEBUG", "INFO", "WARN", "WARNING", "ERROR", "CRITICAL")
+_COMPRESSION_EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+_WRITE_CHUNK_SIZE = 1 << 16  # Characters buffered before each write call.
+_SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+_MAX_BYTES = 64 << 20  # The default size cap of a log file.
+_LOGFILE_SETTINGS = {
+    "directory": None,
+    "compression": None,
+    "max_bytes": _MAX_BYTES,
+    "retention": None,
+}  # type: typing.Dict[str, typing.Any]
 
 
 def write_logfile():
     # type: () -> None
-    """Write a DEBUG log file COMMAND-YYYYMMDD-HHMMSS.ffffff.log."""
+    """Write a DEBUG log file COMMAND-YYYYMMDD-HHMMSS.ffffff.log.
+
+    The file is written to the configured log directory, compressed if
+    compression is enabled, and capped to the configured size by keeping the
+    first and last records. Old log files beyond the retention count are
+    removed afterwards.
+    """
     command = os.path.basename(os.path.realpath(os.path.abspath(sys.argv[0])))
     now = datetime.datetime.now().strftime("%Y%m%d-%H%M%S.%f")
-    filename = "{}-{}.log".format(command, now)
-    with open(filename, "w") as logfile:
-        if six.PY3:
-            logfile.write(_LOGFILE_STREAM.getvalue())
-        else:
-            logfile.write(
-                _LOGFILE_STREAM.getvalue().decode(  # type: ignore
-                    errors="replace"
-                )
-            )
+    directory = _LOGFILE_SETTINGS["directory"] or os.curdir
+    compression = _LOGFILE_SETTINGS["compression"]
+    filename = os.path.join(
+        directory,
+        "{}-{}.log{}".format(
+            command, now, _COMPRESSION_EXTENSIONS[compression]
+        ),
+    )
+    flush()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with _open_logfile(filename, compression) as logfile:
+        chunk = []  # type: typing.List[str]
+        size = 0
+        for line in _CAPTURE_HANDLER.lines(_LOGFILE_SETTINGS["max_bytes"]):
+            chunk.append(line)
+            size += len(line)
+            if size >= _WRITE_CHUNK_SIZE:
+                logfile.write("".join(chunk))
+                chunk, size = [], 0
+        logfile.write("".join(chunk))
+    if _LOGFILE_SETTINGS["retention"]:
+        _remove_old_logfiles(
+            directory, command, _LOGFILE_SETTINGS["retention"]
+        )
+
+
+def configure_logfile(
+    directory=None,  # type: typing.Optional[str]
+    compression=None,  # type: typing.Optional[str]
+    max_bytes=None,  # type: typing.Optional[int]
+    retention=None,  # type: typing.Optional[int]
+):
+    # type: (...) -> None
+    """Set how log files are written.
+
+    Args:
+        directory: The directory to write log files into. Defaults to the
+            current working directory.
+        compression: One of "gzip" or "zstd", or None to write plain text.
+            If the zstandard package is not installed, gzip is used instead.
+        max_bytes: The maximum number of uncompressed bytes written to a log
+            file. The first and last records are kept and the records in
+            between are replaced with a note. Defaults to 64 MiB, so that
+            the file can be written within a SIGTERM grace period. 0 means
+            unlimited.
+        retention: The number of log files to keep for the command. Older
+            files are removed after a new one is written. None keeps all files.
+    """
+    if compression == "zstd" and zstandard is None:
+        _LOGGER.debug("zstandard is not installed. Using gzip compression.")
+        compression = "gzip"
+    _LOGFILE_SETTINGS.update(
+        directory=os.path.expanduser(directory) if directory else None,
+        compression=compression,
+        max_bytes=_MAX_BYTES if max_bytes is None else max_bytes,
+        retention=retention,
+    )
+
+
+def get_logfile_settings(config):
+    # type: (typing.Any) -> typing.Dict[str, typing.Any]
+    """Get the log file settings.
+
+    Settings are read from the log_dir, log_compression, log_max_bytes and
+    log_retention values of the [rcli] section of setup.cfg and may be
+    overridden by the RCLI_LOG_DIR, RCLI_LOG_COMPRESSION, RCLI_LOG_MAX_BYTES
+    and RCLI_LOG_RETENTION environment variables. Sizes may use a K, M or G
+    suffix.
+
+    Args:
+        config: The rcli settings object.
+
+    Returns:
+        A dictionary of keyword arguments for configure_logfile.
+
+    Raises:
+        InvalidCliValueError: Raised if a configured value is not valid.
+    """
+    compression = os.environ.get(
+        "RCLI_LOG_COMPRESSION", config.log_compression
+    )
+    if compression in (False, "none", ""):
+        compression = None
+    if compression not in _COMPRESSION_EXTENSIONS:
+        raise exceptions.InvalidCliValueError(
+            "log_compression", compression, ("gzip", "zstd", "none")
+        )
+    max_bytes = os.environ.get("RCLI_LOG_MAX_BYTES", config.log_max_bytes)
+    retention = os.environ.get("RCLI_LOG_RETENTION", config.log_retention)
+    return {
+        "directory": os.environ.get("RCLI_LOG_DIR", config.log_dir),
+        "compression": compression,
+        "max_bytes": _parse_size("log_max_bytes", max_bytes),
+        "retention": _parse_size("log_retention", retention),
+    }
+
+
+def _open_logfile(filename, compression):
+    # type: (str, typing.Optional[str]) -> typing.TextIO
+    """Open a text stream that writes to the log file.
+
+    Args:
+        filename: The path of the log file.
+        compression: The compression to use or None.
+
+    Returns:
+        A writable text stream. Compressed streams use a fast compression level
+        so that the file can be written within a SIGTERM grace period.
+    """
+    if compression == "gzip":
+        return gzip.open(filename, "wt", compresslevel=1, errors="replace")
+    if compression == "zstd":
+        raw = open(filename, "wb")
+        writer = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return io.TextIOWrapper(writer, encoding="utf-8", errors="replace")
+    return open(filename, "w", errors="replace")
+
+
+def _remove_old_logfiles(directory, command, retention):
+    # type: (str, str, int) -> None
+    """Remove all but the newest log files for the command.
+
+    Args:
+        directory: The directory containing the log files.
+        command: The name of the command that wrote the log files.
+        retention: The number of log files to keep.
+    """
+    pattern = re.compile(
+        r"{}-\d{{8}}-\d{{6}}\.\d{{6}}\.log(\.gz|\.zst)?$".format(
+            re.escape(command)
+        )
+    )
+    logfiles = sorted(
+        f
+        for f in glob.glob(os.path.join(directory, "{}-*".format(command)))
+        if pattern.match(os.path.basename(f))
+    )
+    for logfile in logfiles[: max(len(logfiles) - retention, 0)]:
+        try:
+            os.remove(logfile)
+        except OSError:
+            _LOGGER.debug("Unable to remove old log file %s.", logfile)
 
 
 def get():
     # type: () -> str
     """Return the logs generated up to this point."""
-    return _LOGFILE_STREAM.getvalue()
+    flush()
+    return "".join(_CAPTURE_HANDLER.lines())
 
 
 # pragma pylint: disable=redefined-builtin
@@ -59,6 +238,7 @@ def excepthook(type, value, traceback):  # pylint: disable=unused-argument
     except type:
         _LOGGER.exception(str(value))
     if isinstance(value, KeyboardInterrupt):
+        flush()
         message = "Cancelling at the user's request."
     else:
         message = handle_unexpected_exception(value)
@@ -90,28 +270,158 @@ def handle_unexpected_exception(exc):
         return str(exc)
 
 
-def enable_logging(log_level):
-    # type: (typing.Union[None, int]) -> None
+def enable_logging(
+    log_level,  # type: typing.Union[None, int]
+    capture_level=None,  # type: typing.Union[None, int]
+    capture_levels=None,  # type: typing.Optional[typing.Dict[str, int]]
+    capture_rate_limits=None,  # type: typing.Optional[typing.Dict[str, float]]
+):
+    # type: (...) -> None
     """Configure the root logger and a logfile handler.
 
+    Messages are rendered on the logging thread and handed to a queue. Log
+    lines are formatted and written by a background listener thread.
+
     Args:
         log_level: The logging level to set the logger handler.
+        capture_level: The lowest level captured for the crash log. Defaults
+            to DEBUG, or to log_level if it is set.
+        capture_levels: A mapping of logger names to the lowest level captured
+            from that logger and its children.
+        capture_rate_limits: A mapping of logger names to the maximum number of
+            records per second captured from that logger and its children.
+            Records that are also displayed on the console are never dropped.
     """
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
-    logfile_handler = logging.StreamHandler(_LOGFILE_STREAM)
-    logfile_handler.setLevel(logging.DEBUG)
-    logfile_handler.setFormatter(
-        logging.Formatter("%(levelname)s [%(asctime)s][%(name)s] %(message)s")
-    )
-    root_logger.addHandler(logfile_handler)
+    if capture_level is None:
+        capture_level = log_level or logging.DEBUG
+    root_logger.setLevel(min(capture_level, log_level or capture_level))
+    for name, level in six.iteritems(capture_levels or {}):
+        logging.getLogger(name).setLevel(min(level, log_level or level))
+    global _CAPTURE_FILTER  # pylint: disable=global-statement
+    _QUEUE_HANDLER.removeFilter(_CAPTURE_FILTER)
+    _CAPTURE_FILTER = None
+    if (log_level and capture_level > log_level) or (
+        capture_levels or capture_rate_limits
+    ):
+        _CAPTURE_FILTER = _CaptureFilter(
+            log_level, capture_level, capture_levels, capture_rate_limits
+        )
+        _QUEUE_HANDLER.addFilter(_CAPTURE_FILTER)
+    if _QUEUE_HANDLER not in root_logger.handlers:
+        root_logger.addHandler(_QUEUE_HANDLER)
+    handlers = [_CAPTURE_HANDLER]  # type: typing.List[logging.Handler]
     if signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
         signal.signal(signal.SIGTERM, _logfile_sigterm_handler)
     if log_level:
         handler = logging.StreamHandler()
-        handler.setFormatter(_LogColorFormatter())
-        root_logger.setLevel(log_level)
-        root_logger.addHandler(handler)
+        handler.setLevel(log_level)
+        handler.setFormatter(_LogColorFormatter(handler.stream))
+        handlers.append(handler)
+    _start_listener(handlers)
+
+
+def get_capture_settings(config):
+    # type: (typing.Any) -> typing.Dict[str, typing.Any]
+    """Get the crash log capture settings.
+
+    Settings are read from the [rcli] section of setup.cfg and may be
+    overridden by the RCLI_CAPTURE_LEVEL, RCLI_CAPTURE_LEVELS and
+    RCLI_CAPTURE_RATE_LIMITS environment variables. The mappings may be given
+    as JSON objects or as comma separated name=value pairs.
+
+    Args:
+        config: The rcli settings object.
+
+    Returns:
+        A dictionary of keyword arguments for enable_logging.
+
+    Raises:
+        InvalidCliValueError: Raised if a configured level or rate limit is not
+            valid.
+    """
+    level = os.environ.get("RCLI_CAPTURE_LEVEL", config.capture_level)
+    levels = os.environ.get("RCLI_CAPTURE_LEVELS", config.capture_levels)
+    limits = os.environ.get(
+        "RCLI_CAPTURE_RATE_LIMITS", config.capture_rate_limits
+    )
+    return {
+        "capture_level": (
+            _parse_level("capture_level", level) if level else None
+        ),
+        "capture_levels": {
+            name: _parse_level("capture_levels", value)
+            for name, value in six.iteritems(_parse_mapping(levels))
+        },
+        "capture_rate_limits": {
+            name: _parse_rate("capture_rate_limits", value)
+            for name, value in six.iteritems(_parse_mapping(limits))
+        },
+    }
+
+
+def _parse_level(setting, value):
+    # type: (str, typing.Union[int, str]) -> int
+    """Convert a level name or number into a logging level."""
+    if isinstance(value, int) or six.text_type(value).isdigit():
+        return int(value)
+    if six.text_type(value).upper() not in _LEVEL_NAMES:
+        raise exceptions.InvalidCliValueError(setting, value, _LEVEL_NAMES)
+    return getattr(logging, value.upper())
+
+
+def _parse_rate(setting, value):
+    # type: (str, typing.Union[float, str]) -> float
+    """Convert a records per second limit into a positive float."""
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        rate = 0
+    if rate <= 0:
+        raise exceptions.InvalidCliValueError(setting, value)
+    return rate
+
+
+def _parse_size(setting, value):
+    # type: (str, typing.Union[None, int, str]) -> typing.Optional[int]
+    """Convert a count or a size with a K, M or G suffix into an integer."""
+    if value in (None, ""):
+        return None
+    text = six.text_type(value).strip().upper()
+    multiplier = _SIZE_SUFFIXES.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    if not text.isdigit():
+        raise exceptions.InvalidCliValueError(setting, value)
+    return int(text) * multiplier
+
+
+def _parse_mapping(value):
+    # type: (typing.Union[None, str, typing.Dict[str, typing.Any]]) -> dict
+    """Parse a JSON object or comma separated name=value pairs."""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+    try:
+        return dict(json.loads(value))
+    except (TypeError, ValueError):
+        pairs = (p.split("=", 1) for p in value.split(",") if "=" in p)
+        return {k.strip(): v.strip() for k, v in pairs}
+
+
+def flush(timeout=_FLUSH_TIMEOUT):
+    # type: (float) -> None
+    """Wait for all records queued so far to be handled.
+
+    Args:
+        timeout: The maximum number of seconds to wait for the listener.
+    """
+    if _LISTENER is None or threading.current_thread() is _LISTENER._thread:
+        return
+    marker = threading.Event()
+    _QUEUE_HANDLER.queue.put_nowait(marker)
+    marker.wait(timeout)
 
 
 def get_log_level(args):
@@ -172,9 +482,368 @@ def _logfile_sigterm_handler(*_):
     sys.exit(signal)
 
 
+class _CaptureFilter(logging.Filter):
+    """Drop records that are only destined for the crash log.
+
+    Records at or above the console level always pass. Other records must meet
+    the capture level of their logger and fit within its rate limit. Records
+    that pass only for the console are marked so the capture handler skips
+    them.
+    """
+
+    def __init__(self, console_level, level, levels=None, rate_limits=None):
+        # type: (...) -> None
+        """Initialize the filter.
+
+        Args:
+            console_level: The level displayed on the console or None.
+            level: The default capture level.
+            levels: A mapping of logger names to capture levels.
+            rate_limits: A mapping of logger names to records per second.
+        """
+        super(_CaptureFilter, self).__init__()
+        self._console_level = console_level or logging.CRITICAL + 1
+        self._rules = {
+            "": (level, None)
+        }  # type: typing.Dict[str, typing.Tuple[int, typing.Any]]
+        for name in sorted(set(levels or {}) | set(rate_limits or {})):
+            rate = (rate_limits or {}).get(name)
+            self._rules[name] = (
+                (levels or {}).get(name, self._resolve(name)[0]),
+                _TokenBucket(rate) if rate else None,
+            )
+        self._cache = {}  # type: typing.Dict[str, typing.Tuple]
+
+    def filter(self, record):
+        # type: (logging.LogRecord) -> bool
+        """Return whether the record should be queued.
+
+        Args:
+            record: The record to check.
+
+        Returns:
+            True if the record is displayed on the console or captured.
+        """
+        try:
+            level, bucket = self._cache[record.name]
+        except KeyError:
+            level, bucket = self._cache[record.name] = self._resolve(
+                record.name
+            )
+        captured = record.levelno >= level and (
+            bucket is None or bucket.take(record.created)
+        )
+        if record.levelno >= self._console_level:
+            record.rcli_captured = captured
+            return True
+        return captured
+
+    def _resolve(self, name):
+        # type: (str) -> typing.Tuple[int, typing.Any]
+        """Find the rule for the closest configured ancestor of the logger."""
+        while name not in self._rules:
+            name = name.rpartition(".")[0]
+        return self._rules[name]
+
+
+class _TokenBucket(object):
+    """A token bucket that refills at a fixed rate per second."""
+
+    def __init__(self, rate):
+        # type: (float) -> None
+        """Initialize a full bucket.
+
+        Args:
+            rate: The number of tokens added per second. This is also the
+                capacity of the bucket.
+        """
+        self._rate = rate
+        self._tokens = rate
+        self._last = 0.0
+
+    def take(self, now):
+        # type: (float) -> bool
+        """Take a token if one is available.
+
+        Args:
+            now: The current time in seconds.
+
+        Returns:
+            True if a token was taken.
+        """
+        self._tokens = min(
+            self._rate, self._tokens + (now - self._last) * self._rate
+        )
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class _CaptureHandler(logging.Handler):
+    """A handler that stores log records for the crash log.
+
+    Records are kept as compact tuples of their message and fields, and are
+    only formatted into lines when a log file is actually written. Messages
+    are rendered when the record is captured, so the log shows arguments as
+    they were when they were logged and does not keep them alive.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        """Initialize the handler with an empty record store."""
+        super(_CaptureHandler, self).__init__(logging.DEBUG)
+        self._records = []  # type: typing.List[typing.Tuple]
+        self._second = None  # type: typing.Optional[int]
+        self._time = ""
+
+    def emit(self, record):
+        # type: (logging.LogRecord) -> None
+        """Store the message and fields of the record.
+
+        Tracebacks are rendered immediately so that the frames they reference
+        are not kept alive until the log file is written.
+
+        Args:
+            record: The log record to store.
+        """
+        if not getattr(record, "rcli_captured", True):
+            return
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+        self._records.append(
+            (
+                record.created,
+                record.msecs,
+                record.levelname,
+                record.name,
+                _get_message(record),
+                exc_text,
+                record.stack_info,
+            )
+        )
+
+    def lines(self, max_bytes=None):
+        # type: (typing.Optional[int]) -> typing.Iterator[str]
+        """Yield each stored record formatted as a log file line.
+
+        Args:
+            max_bytes: The maximum number of bytes to yield, or None or 0 for
+                no limit. If the records do not fit, the first and last
+                records that fit in half of the limit each are yielded around
+                a line noting how many records were omitted.
+        """
+        records = list(self._records)
+        if not max_bytes:
+            for raw in records:
+                yield self._format(raw)
+            return
+        max_bytes = max(max_bytes - 64, 0)  # Leave room for the omitted note.
+        size = head = 0
+        for head, raw in enumerate(records):
+            line = self._format(raw)
+            size += len(line.encode("utf-8", "replace"))
+            if size > max_bytes // 2:
+                break
+            yield line
+        else:
+            return
+        tail = []  # type: typing.List[str]
+        size = 0
+        for raw in reversed(records[head:]):
+            line = self._format(raw)
+            size += len(line.encode("utf-8", "replace"))
+            if size > max_bytes - max_bytes // 2:
+                break
+            tail.append(line)
+        omitted = len(records) - head - len(tail)
+        if omitted:
+            yield "... {} records omitted ...\n".format(omitted)
+        for line in reversed(tail):
+            yield line
+
+    def _format(self, raw):
+        # type: (typing.Tuple) -> str
+        """Format a stored record as a log file line.
+
+        The line is the one _LOGFILE_FORMAT gives, but it is built with a
+        precompiled template and the time is only converted once a second.
+        """
+        created, msecs, levelname, name, message, exc_text, stack = raw
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._time = time.strftime(_TIME_FORMAT, time.localtime(created))
+        line = _LOGFILE_TEMPLATE.format(
+            levelname, self._time, int(msecs), name, message
+        )
+        for text in (exc_text, stack):
+            if text:
+                line = "{}{}{}".format(
+                    line, "" if line.endswith("\n") else "\n", text
+                )
+        return line + "\n"
+
+
+def _get_message(record):
+    # type: (logging.LogRecord) -> str
+    """Merge the arguments of a record into its message.
+
+    Args:
+        record: The log record.
+
+    Returns:
+        The message, or a note of the message and arguments if they do not
+        fit together.
+    """
+    try:
+        return record.getMessage()
+    except Exception:  # pylint: disable=broad-except
+        return "Unable to format {!r} with {!r}.".format(
+            record.msg, record.args
+        )
+
+
+_CAPTURE_HANDLER = _CaptureHandler()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """A handler that renders messages before passing records to a queue."""
+
+    def prepare(self, record):
+        # type: (logging.LogRecord) -> logging.LogRecord
+        """Render the message and traceback of a copy of the record.
+
+        Like QueueHandler.prepare, this runs in the logging thread, so
+        arguments that change after the call cannot change or break the
+        message while the listener formats it. Unlike QueueHandler, only the
+        message is rendered, because the console and the crash log format
+        their lines differently.
+
+        Args:
+            record: The log record to enqueue.
+
+        Returns:
+            A copy of the log record without arguments or exception
+            information.
+        """
+        record = copy.copy(record)
+        record.msg = record.message = _get_message(record)
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _TRACEBACK_FORMATTER.formatException(
+                    record.exc_info
+                )
+            record.exc_info = None
+        return record
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """A queue listener that acknowledges flush markers."""
+
+    def handle(self, record):
+        # type: (typing.Union[logging.LogRecord, threading.Event]) -> None
+        """Handle a record or acknowledge a flush marker.
+
+        Args:
+            record: The log record to handle or an event to set once every
+                record queued before it has been handled.
+        """
+        if isinstance(record, threading.Event):
+            record.set()
+        else:
+            super(_LogListener, self).handle(record)
+
+
+def _start_listener(handlers):
+    # type: (typing.Sequence[logging.Handler]) -> None
+    """Replace the running queue listener with one for the given handlers.
+
+    Args:
+        handlers: The handlers that will receive the queued records.
+    """
+    global _LISTENER  # pylint: disable=global-statement
+    _stop_listener()
+    _LISTENER = _LogListener(
+        _QUEUE_HANDLER.queue, *handlers, respect_handler_level=True
+    )
+    _LISTENER.start()
+
+
+def _stop_listener():
+    # type: () -> None
+    """Handle all queued records and stop the listener thread."""
+    if _LISTENER is not None and _LISTENER._thread:
+        _LISTENER.stop()
+
+
+def _restart_listener_in_child():
+    # type: () -> None
+    """Reset process-wide logging state after a fork.
+
+    Forked workers must not write crash logs for the parent on SIGTERM and do
+    not inherit the parent's listener thread, so a new listener is started.
+    """
+    if signal.getsignal(signal.SIGTERM) is _logfile_sigterm_handler:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if _LISTENER is not None and _LISTENER._thread:
+        _QUEUE_HANDLER.queue = _Queue()
+        _LISTENER._thread = None
+        _start_listener(_LISTENER.handlers)
+
+
+# SimpleQueue.put is reentrant, so the SIGTERM handler can log safely.
+_Queue = getattr(queue, "SimpleQueue", queue.Queue)
+_QUEUE_HANDLER = _QueueHandler(_Queue())
+_LISTENER = None  # type: typing.Optional[_LogListener]
+_CAPTURE_FILTER = None  # type: typing.Optional[_CaptureFilter]
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
 class _LogColorFormatter(logging.Formatter):
     """A colored logging.Formatter implementation."""
 
+    _LEVEL_COLORS = (
+        (logging.ERROR, colorama.Fore.RED),
+        (logging.WARNING, colorama.Fore.YELLOW),
+        (logging.INFO, colorama.Fore.RESET),
+        (logging.NOTSET, colorama.Fore.CYAN),
+    )
+
+    def __init__(self, stream=None):
+        # type: (typing.Optional[typing.TextIO]) -> None
+        """Precompute a formatter for each level color.
+
+        Args:
+            stream: The stream the formatted records will be written to. Colors
+                are only used if the stream is a TTY.
+        """
+        super(_LogColorFormatter, self).__init__()
+        isatty = getattr(stream or sys.stderr, "isatty", None)
+        tty = bool(isatty and isatty())
+        template = "{}{}%(levelname)s{} [%(asctime)s][%(name)s]{} %(message)s"
+        self._formatters = [
+            (
+                level,
+                logging.Formatter(
+                    template.format(
+                        colorama.Style.BRIGHT,
+                        color,
+                        colorama.Fore.RESET,
+                        colorama.Style.RESET_ALL,
+                    )
+                    if tty
+                    else template.format(*[""] * 4)
+                ),
+            )
+            for level, color in self._LEVEL_COLORS
+        ]
+
     def format(self, record):
         # type: (logging.LogRecord) -> str
         """Format the log record with timestamps and level based colors.
@@ -185,26 +854,7 @@ class _LogColorFormatter(logging.Formatter):
         Returns:
             The formatted log record.
         """
-        if record.levelno >= logging.ERROR:
-            color = colorama.Fore.RED
-        elif record.levelno >= logging.WARNING:
-            color = colorama.Fore.YELLOW
-        elif record.levelno >= logging.INFO:
-            color = colorama.Fore.RESET
-        else:
-            color = colorama.Fore.CYAN
-        format_template = (
-            "{}{}%(levelname)s{} [%(asctime)s][%(name)s]{} %(message)s"
-        )
-        if sys.stdout.isatty():
-            self._fmt = format_template.format(
-                colorama.Style.BRIGHT,
-                color,
-                colorama.Fore.RESET,
-                colorama.Style.RESET_ALL,
-            )
-        else:
-            self._fmt = format_template.format(*[""] * 4)
-        if six.PY3:
-            self._style._fmt = self._fmt  # pylint: disable=protected-access
-        return super(_LogColorFormatter, self).format(record)
+        for level, formatter in self._formatters:
+            if record.levelno >= level:
+                return formatter.format(record)
+        return self._formatters[-1][1].format(record)
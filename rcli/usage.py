@@ -28,13 +28,15 @@ import six
 
 from .backports.get_terminal_size import get_terminal_size
 from .config import settings
+from .display.width import width as text_width
+from .display.wrap import wrap
 
 _LOGGER = logging.getLogger(__name__)
 
 _DEFAULT_DOC = """
 Usage:
   {command} [--help] [--version] [--log-level <level> | --debug | --verbose]
-            <command> [<args>...]
+{{task_usage}}            <command> [<args>...]
 
 Options:
   -h, --help           Display this help message and exit.
@@ -42,22 +44,42 @@ Options:
   -d, --debug          Set the log level to DEBUG.
   -v, --verbose        Set the log level to INFO.
   --log-level <level>  Set the log level to one of DEBUG, INFO, WARN, or ERROR.
-{{message}}
+{{task_options}}{{message}}
 '{command} help -a' lists all available subcommands.
 See '{command} help <command>' for more information on a specific command.
 """.format(
     command=settings.command
 )
 
+_TASK_USAGE = """
+            [--no-cache] [--resume] [--shard <i/n>] [--summary <file>]
+"""[1:]
+
+_TASK_OPTIONS = """
+  --no-cache           Run tasks even if their inputs have not changed.
+  --resume             Skip tasks completed by an interrupted run.
+  --shard <i/n>        Run only the i-th of n balanced shards of the tasks.
+  --summary <file>     Append a summary of the task results to the file.
+"""[1:]
+
 
 def get_primary_command_usage(message=""):
     # type: (str) -> str
-    """Return the usage string for the primary command."""
+    """Return the usage string for the primary command.
+
+    The task runner options are only included for commands that enable the
+    task_options setting.
+    """
     if not settings.merge_primary_command and None in settings.subcommands:
         return format_usage(settings.subcommands[None].__doc__)
     if not message:
         message = "\n{}\n".format(settings.message) if settings.message else ""
-    doc = _DEFAULT_DOC.format(message=message)
+    tasks = bool(settings.task_options)
+    doc = _DEFAULT_DOC.format(
+        message=message,
+        task_usage=_TASK_USAGE if tasks else "",
+        task_options=_TASK_OPTIONS if tasks else "",
+    )
     if None in settings.subcommands:
         return _merge_doc(doc, settings.subcommands[None].__doc__)
     return format_usage(doc)
@@ -232,9 +254,7 @@ def _wrap_section(source, width):
     if _is_definition_section(source):
         return _wrap_definition_section(source, width)
     lines = inspect.cleandoc(source).splitlines()
-    paragraphs = (
-        textwrap.wrap(line, width, replace_whitespace=False) for line in lines
-    )
+    paragraphs = (wrap(line, width) for line in lines)
     return "\n".join(line for paragraph in paragraphs for line in paragraph)
 
 
@@ -270,15 +290,15 @@ def _wrap_usage_section(source, width):
     Returns:
         The wrapped section string.
     """
-    if not any(len(line) > width for line in source.splitlines()):
+    if not any(text_width(line) > width for line in source.splitlines()):
         return source
     section_header = source[: source.index(":") + 1].strip()
     lines = [section_header]
     for commands, args in parse_commands(source):
         command = "  {} ".format(" ".join(commands))
-        max_len = width - len(command)
-        sep = "\n" + " " * len(command)
-        wrapped_args = sep.join(textwrap.wrap(" ".join(args), max_len))
+        max_len = width - text_width(command)
+        sep = "\n" + " " * text_width(command)
+        wrapped_args = sep.join(wrap(" ".join(args), max_len))
         full_command = command + wrapped_args
         lines += full_command.splitlines()
     return "\n".join(lines)
@@ -302,10 +322,12 @@ def _wrap_definition_section(source, width):
     sep = "\n" + " " * (max_len + 4)
     lines = [source[:index].strip()]
     for arg, desc in six.iteritems(definitions):
-        wrapped_desc = sep.join(textwrap.wrap(desc, width - max_len - 4))
+        wrapped_desc = sep.join(wrap(desc, width - max_len - 4))
         lines.append(
-            "  {arg:{size}}  {desc}".format(
-                arg=arg, size=str(max_len), desc=wrapped_desc
+            "  {arg}{pad}  {desc}".format(
+                arg=arg,
+                pad=" " * (max_len - text_width(arg)),
+                desc=wrapped_desc,
             )
         )
     return "\n".join(lines)
@@ -330,7 +352,7 @@ def _get_definitions(source):
     for line in non_empty_lines:
         if line:
             arg, desc = re.split(r"\s\s+", line.strip())
-            arg_len = len(arg)
+            arg_len = text_width(arg)
             if arg_len > max_len:
                 max_len = arg_len
             descs[arg] = desc
@@ -29,18 +29,23 @@ setup(
     url="https://github.com/contains-io/rcli",
     keywords=["docopt", "commands", "subcommands", "tooling", "cli"],
     license="MIT",
-    packages=find_packages(exclude=["tests", "docs"]),
+    packages=find_packages(
+        exclude=["tests", "docs", "benchmarks", "benchmarks.*"]
+    ),
     install_requires=[
         "typet >= 0.4, < 0.5",
         "backports.shutil_get_terminal_size",
         "colorama >= 0.3.6, < 1",
         "tqdm >= 4.9.0, < 5",
+        "contextvars; python_version < '3.7'",
     ]
     + common_requires,
+    extras_require={"zstd": ["zstandard"]},
     setup_requires=["packaging", "appdirs", "pytest-runner", "setuptools_scm"]
     + common_requires,
     tests_require=["pytest >= 3.0"],
     entry_points={
+        "console_scripts": ["rcli-merge = rcli.display.shards:main"],
         "distutils.setup_keywords": [
             "autodetect_commands = rcli.autodetect:setup_keyword"
         ],
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 
+import signal
+import threading
+
+import pytest
+
+from rcli.display import terminal
+from rcli.display.io import Multiplexer
 from rcli.display.box import Box, box
 from rcli.display.style import Alignment, Style
+from rcli.display.table import table
 
 
 def test_simple_box():
@@ -199,3 +207,160 @@ def test_box_with_headers_single_align():
         print("Test 21")
         b.sep("Test 21")
         print("Test 21")
+
+
+def test_plain_box(capsys):
+    terminal.set_plain()
+    try:
+        with Style(43), Box.thick(size=20, header="Test 22") as b:
+            print("Test 22")
+            b.sep()
+            with Style(30, 45):
+                print("Test 22")
+    finally:
+        terminal.set_plain(False)
+    out = capsys.readouterr().out
+    assert "\x1b" not in out
+    assert out.splitlines() == [
+        "┏━ Test 22 " + "━" * 8 + "┓",
+        "┃ Test 22          ┃",
+        "┣" + "━" * 18 + "┫",
+        "┃ Test 22          ┃",
+        "┗" + "━" * 18 + "┛",
+    ]
+
+
+def test_streaming_box(capsys):
+    terminal.set_plain()
+    try:
+        with box(size=12):
+            capsys.readouterr()
+            print("Test", end="")
+            assert capsys.readouterr().out == ""
+            print(" 23")
+            assert capsys.readouterr().out == "│ Test 23  │\n"
+            print("Test 23", end="")
+    finally:
+        terminal.set_plain(False)
+    assert capsys.readouterr().out.splitlines() == [
+        "│ Test 23  │",
+        "└" + "─" * 10 + "┘",
+    ]
+
+
+def test_plain_nested_box(capsys):
+    terminal.set_plain()
+    try:
+        with box(size=20):
+            with box(size=20) as b:
+                print("Test 24")
+                b.sep()
+                print("Test 24 is too long")
+            print("Test 24")
+    finally:
+        terminal.set_plain(False)
+    assert capsys.readouterr().out.splitlines() == [
+        "┌" + "─" * 18 + "┐",
+        "│ ┌" + "─" * 14 + "┐ │",
+        "│ │ Test 24      │ │",
+        "│ ├" + "─" * 14 + "┤ │",
+        "│ │ Test 24 is   │ │",
+        "│ │ too long     │ │",
+        "│ └" + "─" * 14 + "┘ │",
+        "│ Test 24          │",
+        "└" + "─" * 18 + "┘",
+    ]
+
+
+def test_style_interned():
+    assert Style(31, bold=True) is Style("31", bold=True)
+    assert Style(bold=True) is Style.bold
+    assert Style.bold.bold is True and Style.bold.dim is None
+    assert str(Style(31, 45, dim=False)) == "\x1b[0m\x1b[31;45;22m"
+    with Style(31), Style(bold=True):
+        assert Style.current() is Style(31, bold=True)
+    try:
+        Style.bold.foreground = "31"
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Style objects must be immutable.")
+
+
+def test_plain_wide_box(capsys):
+    terminal.set_plain()
+    try:
+        with box(size=12):
+            print("日本語")
+            print("Test 25")
+    finally:
+        terminal.set_plain(False)
+    assert capsys.readouterr().out.splitlines()[1:3] == [
+        "│ 日本語   │",
+        "│ Test 25  │",
+    ]
+
+
+def test_concurrent_boxes(capsys):
+    terminal.set_plain()
+    try:
+        with box(size=14):
+            output = Multiplexer(block=True)
+
+            def render(name):
+                with output.task(), box():
+                    for i in range(50):
+                        print(f"{name} {i}")
+
+            threads = [
+                threading.Thread(target=render, args=(name,))
+                for name in ("a", "b")
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        terminal.set_plain(False)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 + 2 * 52
+    for block in (lines[1:53], lines[53:105]):
+        name = block[1][4]
+        assert block[0] == "│ ┌" + "─" * 8 + "┐ │"
+        assert block[1:-1] == [f"│ │ {name} {i:<5}│ │" for i in range(50)]
+        assert block[-1] == "│ └" + "─" * 8 + "┘ │"
+
+
+def test_plain_table_box(capsys):
+    terminal.set_plain()
+    try:
+        with box(size=20):
+            table(
+                ((i, "x" * i) for i in range(8, 12)),
+                headers=["N", "Text"],
+                align=[Alignment.RIGHT],
+            )
+    finally:
+        terminal.set_plain(False)
+    assert capsys.readouterr().out.splitlines()[1:-1] == [
+        "│  N  Text         │",
+        "│ ──  ───────────  │",
+        "│  8  xxxxxxxx     │",
+        "│  9  xxxxxxxxx    │",
+        "│ 10  xxxxxxxxxx   │",
+        "│ 11  xxxxxxxxxxx  │",
+    ]
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGWINCH"), reason="No SIGWINCH")
+def test_width_key_replaced_handler(monkeypatch):
+    previous = signal.getsignal(signal.SIGWINCH)
+    monkeypatch.setattr(terminal, "cols", lambda: 40)
+    try:
+        assert terminal.width_key()[0] == "resizes"
+        signal.signal(signal.SIGWINCH, lambda signum, frame: None)
+        assert terminal.width_key() == ("cols", 40)
+        monkeypatch.setattr(terminal, "cols", lambda: 50)
+        assert terminal.width_key() == ("cols", 50)
+    finally:
+        signal.signal(signal.SIGWINCH, previous)
@@ -190,6 +190,38 @@ def test_merge_primary_command(create_project, run):
         assert run("roar rawr") == "RAWR!\n"
 
 
+def test_task_options(create_project, run):
+    """Test that task options are passed to run_tasks and not exported."""
+    code = '''
+        import os
+
+        import rcli.display
+
+        def tasks():
+            """usage: say tasks"""
+            rcli.display.run_tasks(
+                "Tasks",
+                [("A", lambda: print("ran A")), ("B", lambda: print("ran B"))],
+            )
+            print("RCLI_SHARD={}".format(os.environ.get("RCLI_SHARD")))
+    '''
+    with create_project(code):
+        assert "--shard" not in run("say --help")
+        assert "ran B" in run("say tasks")
+    with create_project(
+        code,
+        """
+        [rcli]
+        task_options = True
+    """,
+    ):
+        assert "--shard <i/n>" in run("say --help")
+        output = run("say --shard 2/2 tasks")
+        assert "ran A" not in output
+        assert "ran B" in output
+        assert "RCLI_SHARD=None" in output
+
+
 def test_subcommand_with_same_name(create_project, run):
     """Test that a command with a subcommand of the same name does not fail."""
     with create_project(
@@ -2,17 +2,35 @@
 """Tests for display widgets."""
 
 import contextlib
+import functools
+import io
+import itertools
+import json
+import os
 import re
 import sys
+import threading
+import time
 
 import colorama
+import pytest
 
 import rcli.display
+import rcli.display.box
+import rcli.display.table
+import rcli.display.util
+import rcli.display.wrap
 
 
 _CTRL_CHAR = re.compile(r"(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]")
 
 
+@pytest.fixture(autouse=True)
+def _cache_dir(monkeypatch, tmpdir):
+    """Keep task state files out of the user cache directory."""
+    monkeypatch.setenv("RCLI_CACHE_DIR", str(tmpdir.join("cache")))
+
+
 def test_run_tasks(capsys):
     """Test that run tasks prints the expected messages."""
     with _colorama(strip=False), _force_tty():
@@ -73,6 +91,555 @@ def test_run_tasks_no_tty(capsys):
     )
 
 
+def test_run_tasks_plain(capsys):
+    """Test that run tasks writes no escape codes in plain mode."""
+    rcli.display.terminal.set_plain()
+    try:
+        rcli.display.run_tasks(
+            "Test Header",
+            [("Task 1", lambda: None), ("Task 2", _custom_status)],
+        )
+    finally:
+        rcli.display.terminal.set_plain(False)
+    output, _ = capsys.readouterr()
+    assert "\x1b" not in output
+    lines = output.split("\n")
+    assert lines[0] == ("=" * 33) + " Test Header " + ("=" * 34)
+    assert lines[1] == "Task 1\t[  OK  ]"
+    assert lines[2] == "Task 2\t[CUSTOM]"
+    assert re.match(
+        r"{0} completed in \d.\d\ds {0}".format(("=" * 30)), lines[3]
+    )
+
+
+def test_run_tasks_concurrent_ordered(capsys):
+    """Test that concurrent tasks are reported in the order given."""
+    started = threading.Barrier(3)
+
+    def _task(delay):
+        def _inner():
+            started.wait(5)
+            time.sleep(delay)
+
+        return _inner
+
+    with _colorama():
+        rcli.display.run_tasks(
+            "Test Header",
+            [("Task {}".format(i), _task(0.1 * (3 - i))) for i in range(3)],
+            max_workers=3,
+        )
+    output, _ = capsys.readouterr()
+    lines = output.split("\n")
+    for i in range(3):
+        assert lines[i + 1].startswith("Task {}".format(i))
+        assert lines[i + 1].endswith("[  OK  ]")
+
+
+def test_run_tasks_concurrent_box(capsys):
+    """Test that output of tasks run on threads stays in the box."""
+    rcli.display.terminal.set_plain()
+    try:
+        with rcli.display.box.box(size=40):
+            rcli.display.run_tasks(
+                "Header",
+                [
+                    ("Task {}".format(i), functools.partial(print, i))
+                    for i in range(4)
+                ],
+                max_workers=2,
+            )
+    finally:
+        rcli.display.terminal.set_plain(False)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("┌") and lines[-1].startswith("└")
+    assert all(line.startswith("│ ") for line in lines[1:-1])
+    for i in range(4):
+        assert "│ {}{}│".format(i, " " * 36) in lines
+
+
+def test_run_tasks_cancelled(capsys):
+    """Test that running thread tasks see that their run was interrupted."""
+    stopped = threading.Event()
+
+    def _wait():
+        deadline = time.time() + 5
+        while not rcli.display.cancelled() and time.time() < deadline:
+            time.sleep(0.01)
+        stopped.set()
+
+    def _interrupt():
+        time.sleep(0.05)
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        rcli.display.run_tasks(
+            "Test Header",
+            [("Wait", _wait), ("Interrupt", _interrupt)],
+            max_workers=2,
+            ordered=False,
+        )
+    assert stopped.wait(1)
+    assert not rcli.display.cancelled()
+
+
+def test_run_tasks_continue_on_error(capsys):
+    """Test that all tasks run when fail_fast is disabled."""
+    ran = []
+    with _colorama():
+        try:
+            rcli.display.run_tasks(
+                "Test Header",
+                [
+                    ("Task 1", _error),
+                    ("Task 2", lambda: ran.append(2)),
+                    ("Task 3", _error),
+                ],
+                max_workers=2,
+                ordered=False,
+                fail_fast=False,
+            )
+        except RuntimeError:
+            pass
+        else:
+            assert False, "The first task error was not raised."
+    output, _ = capsys.readouterr()
+    assert ran == [2]
+    assert output.count("[FAILED]") == 2
+    assert output.count("[  OK  ]") == 1
+
+
+def test_run_tasks_dependencies(capsys):
+    """Test that dependents of a failed task are skipped."""
+    ran = []
+    Task = rcli.display.Task
+    build = Task("Build", lambda: ran.append("build"))
+    with _colorama():
+        try:
+            rcli.display.run_tasks(
+                "Test Header",
+                [
+                    build,
+                    Task("Test", _error, requires=[build]),
+                    Task("Lint", lambda: ran.append("lint"), requires=[build]),
+                    Task("Deploy", _error, requires=["Test", "Lint"]),
+                ],
+                max_workers=2,
+                fail_fast=False,
+            )
+        except RuntimeError:
+            pass
+    output, _ = capsys.readouterr()
+    lines = output.split("\n")
+    assert ran == ["build", "lint"]
+    assert lines[2].startswith("Test") and lines[2].endswith("[FAILED]")
+    assert lines[4].startswith("Deploy") and lines[4].endswith("[ SKIP ]")
+
+
+def test_task_graph_critical_path():
+    """Test that ready tasks on the heaviest path are started first."""
+    Task = rcli.display.Task
+    graph = rcli.display.TaskGraph(
+        [
+            Task("short", None, 1),
+            Task("long", None, 1),
+            Task("long tail", None, 5, requires=["long"]),
+        ]
+    )
+    assert graph.critical_paths == [1, 6, 5]
+    assert graph.pop() == 1
+    assert graph.pop() == 0
+    assert graph.pop() is None
+    graph.complete(1)
+    assert graph.pop() == 2
+
+
+def test_task_graph_cycle():
+    """Test that dependency cycles are rejected."""
+    Task = rcli.display.Task
+    try:
+        rcli.display.TaskGraph(
+            [Task("a", None, requires=["b"]), Task("b", None, requires=["a"])]
+        )
+    except ValueError as e:
+        assert "cycle" in str(e)
+    else:
+        assert False, "The dependency cycle was not detected."
+
+
+def test_run_tasks_cache(capsys, tmpdir):
+    """Test that tasks with unchanged inputs are skipped."""
+    source = tmpdir.join("source.txt")
+    target = tmpdir.join("target.txt")
+    source.write("1")
+    runs = []
+
+    def _copy():
+        runs.append(source.read())
+        target.write(source.read())
+
+    def _run():
+        with _colorama():
+            rcli.display.run_tasks(
+                "Test Header",
+                [
+                    rcli.display.Task(
+                        "Copy",
+                        _copy,
+                        inputs=[str(source)],
+                        outputs=[str(target)],
+                        params={"mode": "copy"},
+                    )
+                ],
+                cache=rcli.display.TaskCache(str(tmpdir.join("cache.json"))),
+            )
+        return capsys.readouterr()[0].split("\n")[1]
+
+    assert _run().endswith("[  OK  ]")
+    assert _run().endswith("[CACHED]")
+    source.write("22")
+    assert _run().endswith("[  OK  ]")
+    target.remove()
+    assert _run().endswith("[  OK  ]")
+    assert runs == ["1", "22", "22"]
+
+
+def test_task_cache_fingerprint(tmpdir):
+    """Test that fingerprints cover constants, closures and bound args."""
+    path = str(tmpdir.join("cache.json"))
+    cache = rcli.display.TaskCache(path, max_files=2)
+
+    def _compile(value):
+        namespace = {}
+        exec("def task():\n    return {!r}\n".format(value), namespace)
+        return namespace["task"]
+
+    def _closure(value):
+        return lambda: value
+
+    def _fingerprint(func, inputs=()):
+        return cache.fingerprint(
+            rcli.display.Task("Task", func, inputs=inputs, params={})
+        )
+
+    fingerprints = [
+        _fingerprint(func)
+        for func in (
+            _compile("one"),
+            _compile("one"),
+            _compile("two"),
+            _closure("one"),
+            _closure("two"),
+            functools.partial(print, "one"),
+            functools.partial(print, "two"),
+        )
+    ]
+    assert fingerprints[0] == fingerprints[1]
+    assert len(set(fingerprints)) == 6
+    for i in range(3):
+        tmpdir.join("{}.txt".format(i)).write(str(i))
+        _fingerprint(print, [str(tmpdir.join("{}.txt".format(i)))])
+    cache.store(rcli.display.Task("Task", print), fingerprints[0])
+    cache.save()
+    with open(path) as cache_file:
+        files = json.load(cache_file)["files"]
+    assert sorted(files) == [str(tmpdir.join(n)) for n in ("1.txt", "2.txt")]
+
+
+def test_run_tasks_resume(capsys):
+    """Test that a resumed run skips the tasks that already completed."""
+    runs = []
+
+    def _run(fail, resume):
+        with _colorama():
+            rcli.display.run_tasks(
+                "Test Header",
+                [
+                    ("Task 1", lambda: runs.append(1)),
+                    ("Task 2", _error if fail else lambda: runs.append(2)),
+                    ("Task 3", lambda: runs.append(3)),
+                ],
+                resume=resume,
+                journal=True,
+            )
+        return capsys.readouterr()[0]
+
+    with pytest.raises(RuntimeError):
+        _run(True, False)
+    capsys.readouterr()
+    output = _run(False, True)
+    assert runs == [1, 2, 3]
+    assert "Task 1" not in output
+    _run(False, True)
+    assert runs == [1, 2, 3, 1, 2, 3]
+
+
+def test_task_journal_lock(tmpdir):
+    """Test that a journal in use by another run is not written."""
+    TaskJournal = rcli.display.TaskJournal
+    assert TaskJournal.for_header("Header").path != (
+        TaskJournal.for_header("Header", (1, 2)).path
+    )
+    path = str(tmpdir.join("tasks.journal"))
+    first, second = TaskJournal(path), TaskJournal(path)
+    assert first.open() == set()
+    first.record("a")
+    assert second.open(resume=True) == set()
+    second.record("b")
+    second.close(remove=True)
+    first.close()
+    assert first.completed() == {"a"}
+    assert second.open(resume=True) == {"a"}
+    second.close(remove=True)
+    assert not os.path.exists(path)
+
+
+def test_run_tasks_durations(capsys, tmpdir):
+    """Test that the longest tasks are started first once timed."""
+    started = []
+
+    def _task(name, delay):
+        def _inner():
+            started.append(name)
+            time.sleep(delay)
+
+        return _inner
+
+    def _run():
+        with _colorama():
+            rcli.display.run_tasks(
+                "Test Header",
+                [("Fast", _task("fast", 0)), ("Slow", _task("slow", 0.05))],
+                max_workers=1,
+                durations=rcli.display.TaskDurations(
+                    str(tmpdir.join("durations.json"))
+                ),
+            )
+        return capsys.readouterr()[0].split("\n")[1:3]
+
+    assert _run()[0].startswith("Fast")
+    assert started == ["fast", "slow"]
+    durations = rcli.display.TaskDurations(str(tmpdir.join("durations.json")))
+    assert durations.estimate("Slow") >= 0.05
+    assert _run()[0].startswith("Fast")
+    assert started[2:] == ["slow", "fast"]
+
+
+def test_run_tasks_shard(capsys, tmpdir):
+    """Test that shards split the tasks and their summaries merge."""
+    Task = rcli.display.Task
+    ran = []
+    summary = str(tmpdir.join("summary.jsonl"))
+    tasks = [
+        Task("Build", lambda: ran.append("build"), 3),
+        Task("Test", lambda: ran.append("test"), 2, requires=["Build"]),
+        Task("Lint", lambda: ran.append("lint"), 4),
+        Task("Docs", _error, 1),
+    ]
+    shards = []
+    for i in (1, 2):
+        del ran[:]
+        with _colorama():
+            try:
+                rcli.display.run_tasks(
+                    "Test Header",
+                    tasks,
+                    shard="{}/2".format(i),
+                    summary=summary,
+                )
+            except RuntimeError:
+                pass
+        shards.append(sorted(ran))
+    assert shards == [["build", "test"], ["lint"]]
+    capsys.readouterr()
+    assert rcli.display.shards.main([summary]) == 1
+    output, _ = capsys.readouterr()
+    assert output.split("\n")[:2] == [
+        "Test Header: 1 FAILED, 3 OK",
+        "  [FAILED] Docs",
+    ]
+    with pytest.raises(ValueError):
+        rcli.display.run_tasks("Test Header", tasks, shard="3/2")
+
+
+def test_run_tasks_shard_durations(capsys, tmpdir):
+    """Test that machines with different histories agree on the shards."""
+    ran = []
+    tasks = [(title, functools.partial(ran.append, title)) for title in "ABCD"]
+    for i, history in enumerate(({"A": 10, "B": 1}, {"C": 10, "D": 1})):
+        durations = rcli.display.TaskDurations(
+            str(tmpdir.join("durations{}.json".format(i)))
+        )
+        for task_id, seconds in history.items():
+            durations.observe(task_id, seconds)
+        with _colorama():
+            rcli.display.run_tasks(
+                "Test Header",
+                tasks,
+                durations=durations,
+                shard=(i + 1, 2),
+            )
+    capsys.readouterr()
+    assert sorted(ran) == list("ABCD")
+
+
+def test_run_tasks_stream(capsys):
+    """Test that streamed tasks are read only as workers become free."""
+    pulled = []
+    done = []
+
+    def _tasks():
+        for i in range(200):
+            pulled.append(i)
+            assert len(pulled) - len(done) <= 4
+            yield ("Task {}".format(i), lambda i=i: done.append(i))
+
+    with _colorama():
+        rcli.display.run_tasks(
+            "Test Header", _tasks(), max_workers=4, stream=True
+        )
+    output, _ = capsys.readouterr()
+    assert sorted(done) == list(range(200))
+    assert output.count("[  OK  ]") == 200
+    with pytest.raises(ValueError):
+        rcli.display.run_tasks(
+            "Test Header",
+            iter([rcli.display.Task("a", None, requires=["b"])]),
+            stream=True,
+        )
+
+
+def test_run_tasks_resources(capsys):
+    """Test that concurrent tasks stay within the resource budget."""
+    Task = rcli.display.Task
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def _task():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    with _colorama():
+        rcli.display.run_tasks(
+            "Test Header",
+            [
+                Task("Task {}".format(i), _task, resources={"memory": 2})
+                for i in range(4)
+            ]
+            + [Task("Small", _task, resources={"memory": 1})],
+            max_workers=4,
+            resources={"memory": 3},
+        )
+    output, _ = capsys.readouterr()
+    assert max(peak) == 2
+    assert output.count("[  OK  ]") == 5
+    with pytest.raises(ValueError):
+        rcli.display.run_tasks(
+            "Test Header",
+            [Task("Huge", _task, resources={"memory": 4})],
+            max_workers=4,
+            resources={"memory": 3},
+        )
+
+
+def test_run_tasks_progress(capsys):
+    """Test that tasks may report their own progress."""
+    updates = []
+
+    def _copy(progress):
+        progress.set_total(1000, "B")
+        for _ in range(1000):
+            progress.advance()
+        updates.append(progress.n)
+
+    with _colorama():
+        rcli.display.run_tasks(
+            "Test Header",
+            [rcli.display.Task("Copy", _copy, 4, progress=True)],
+        )
+    output, _ = capsys.readouterr()
+    assert updates == [1000]
+    assert output.split("\n")[1].endswith("[  OK  ]")
+    deltas = []
+    handle = rcli.display.TaskProgress(4, lambda h, d: deltas.append(d))
+    handle.set_total(10)
+    for _ in range(10):
+        handle.advance()
+    assert handle.n == 10
+    assert 0 < handle.completed == sum(deltas) <= 4
+    assert len(deltas) < 10
+
+
+def test_live_region():
+    """Test that the live region only repaints the characters that change."""
+
+    class _Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+    stream = _Terminal()
+    with rcli.display.live.LiveRegion(stream, fps=1) as live:
+        live.set("progress", "Progress  10%")
+        live.set("task", "Task 1")
+        live.paint()
+        stream.truncate(0)
+        stream.seek(0)
+        live.set("progress", "Progress  20%")
+        live.paint()
+        assert stream.getvalue() == "\r\x1b[1A\x1b[10C2"
+        live.print("Done")
+        live.remove("task")
+        live.paint()
+        assert "Done\nProgress  20%" in stream.getvalue()
+    assert not stream.getvalue().endswith("Progress  20%")
+
+
+def test_run_pipeline(capsys):
+    """Test that pipeline stages pass items along and report statuses."""
+    written = []
+    with _colorama():
+        rcli.display.run_pipeline(
+            "Test Header",
+            range(50),
+            [
+                ("Double", lambda i: i * 2, 3, 2),
+                rcli.display.Stage("Write", written.append, maxsize=1),
+            ],
+        )
+    output, _ = capsys.readouterr()
+    lines = output.split("\n")
+    assert sorted(written) == [i * 2 for i in range(50)]
+    assert lines[1].startswith("Double (50 items)")
+    assert lines[1].endswith("[  OK  ]")
+    assert lines[2].startswith("Write (50 items)")
+
+
+def test_run_pipeline_error(capsys):
+    """Test that a failed stage stops the pipeline."""
+
+    def _check(item):
+        if item == 5:
+            raise RuntimeError()
+        return item
+
+    with _colorama():
+        with pytest.raises(RuntimeError):
+            rcli.display.run_pipeline(
+                "Test Header",
+                itertools.count(),
+                [("Check", _check), ("Sink", lambda item: None)],
+            )
+    output, _ = capsys.readouterr()
+    lines = output.split("\n")
+    assert lines[1].endswith("[FAILED]")
+    assert lines[2].endswith("[ STOP ]")
+
+
 @contextlib.contextmanager
 def _colorama(*args, **kwargs):
     """Temporarily enable colorama."""
@@ -106,3 +673,87 @@ def _force_tty():
         sys.stdout.isatty = stdout_isatty
         sys.stderr.isatty = stderr_isatty
         sys.stdin.isatty = stdin_isatty
+
+
+def test_width():
+    """Test that widths count terminal columns."""
+    width = rcli.display.width.width
+    assert width("Test") == 4
+    assert width("\x1b[1;31mTest\x1b[0m") == 4
+    assert width("\x1b]0;title\x07Test") == 4
+    assert width("日本語") == 6
+    assert width("é") == 1
+    assert width("\U0001F389!") == 3
+    truncate = rcli.display.width.truncate
+    assert truncate("\x1b[31m日本語\x1b[0m", 5) == "\x1b[31m日本\x1b[0m"
+    assert truncate("Test", 2) == "Te"
+    util = rcli.display.util
+    remove = util.remove_control_characters
+    assert remove("Test 日本語") == "Test 日本語"
+    assert remove("\x1b[31mTe\x07st\u200b\n") == "[31mTest"
+
+
+def test_wrap():
+    """Test that wrapped lines keep their style and fit their columns."""
+    wrap = rcli.display.wrap.wrap
+    assert list(wrap("The quick brown fox jumps", 10)) == [
+        "The quick",
+        "brown fox",
+        "jumps",
+    ]
+    assert list(wrap("\x1b[31mred text\x1b[0m here", 4)) == [
+        "\x1b[31mred\x1b[0m",
+        "\x1b[31mtext\x1b[0m",
+        "here",
+    ]
+    assert list(wrap("日本語 日本語", 5)) == ["日本", "語 日", "本語"]
+    assert list(wrap(iter(["The qu", "ick bro", "wn fox"]), 9)) == [
+        "The quick",
+        "brown fox",
+    ]
+    assert list(wrap("--no-cache", 6)) == ["--no-c", "ache"]
+
+
+def test_table():
+    """Test that table rows are aligned, narrowed and cut or wrapped."""
+    style = rcli.display.style
+    table = rcli.display.table.Table(
+        ["Name", "Size"],
+        align=[style.Alignment.LEFT, style.Alignment.RIGHT],
+        columns=20,
+        wrap=True,
+    )
+    rows = [("a", 1), ("b" * 23 + " cc", 22), ("日本語", None)]
+    assert list(table.lines(rows)) == [
+        "Name            Size",
+        "──────────────  ────",
+        "a                  1",
+        "bbbbbbbbbbbbbb    22",
+        "bbbbbbbbb cc        ",
+        "日本語              ",
+    ]
+    table = rcli.display.table.Table(widths=[4, None], sample=1, columns=20)
+    rows = iter([("abcdef", 1), ("x", 12345), ("\x1b[31mred text", "y")])
+    assert list(table.lines(rows)) == ["abcd  1", "x     1", "\x1b[31mred   y"]
+
+
+def test_progress(capsys):
+    """Test that progress counts every item read between header lines."""
+    rcli.display.terminal.set_plain()
+    try:
+        items = rcli.display.progress(range(1000), header="Test Header")
+        assert sum(items) == 499500
+        chunks = (["line"] * 10 for _ in range(5))
+        for i, _ in enumerate(
+            rcli.display.progress(chunks, unit="lines", weight=len)
+        ):
+            if i == 2:
+                break
+    finally:
+        rcli.display.terminal.set_plain(False)
+    lines = capsys.readouterr()[0].split("\n")
+    assert lines[0] == ("=" * 33) + " Test Header " + ("=" * 34)
+    assert lines[1].startswith("100%") and "1000/1000" in lines[1]
+    assert re.match(
+        r"{0} completed in \d.\d\ds {0}30lines ".format("=" * 30), lines[2]
+    )
@@ -2,10 +2,17 @@
 """Tests that verify that logging works as expected."""
 
 import glob
+import gzip
+import logging
+import queue
 import re
 import subprocess
 import time
 
+import colorama
+
+import rcli.log
+
 
 _CTRL_CHAR = re.compile(r"(\x9B|\x1B\[)[0-?]*[ -/]*[@-~]")
 _LOG = re.compile(
@@ -167,3 +174,167 @@ def test_sigterm_no_log(create_project):
             process.stderr.close()
         logs = glob.glob(str(project / r"say*.log"))
         assert not logs
+
+
+def test_capture_handler_snapshots_messages():
+    """Test that captured messages show arguments as they were logged."""
+
+    class _Counted(object):
+        formatted = 0
+
+        def __str__(self):
+            _Counted.formatted += 1
+            return "counted"
+
+    handler = rcli.log._CaptureHandler()
+    logger = logging.getLogger("rcli.tests.capture")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    state = {"step": 1}
+    try:
+        logger.debug("value: %s", _Counted())
+        logger.debug("state=%s", state)
+        state["step"] += 1
+        logger.debug("bad %d", "argument")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("failed")
+    finally:
+        logger.removeHandler(handler)
+    assert _Counted.formatted == 1
+    lines = list(handler.lines())
+    assert _Counted.formatted == 1
+    assert _LOG.match(lines[0]).group("log") == "value: counted"
+    assert _LOG.match(lines[1]).group("log") == "state={'step': 1}"
+    assert "Unable to format 'bad %d' with ('argument',)." in lines[2]
+    assert _LOG.match(lines[3]).group("level") == "ERROR"
+    assert "RuntimeError: boom" in lines[3]
+
+
+def test_queue_handler_renders_in_caller():
+    """Test that queued messages are rendered before the listener runs."""
+    queue_handler = rcli.log._QueueHandler(queue.Queue())
+    capture_handler = rcli.log._CaptureHandler()
+    listener = rcli.log._LogListener(queue_handler.queue, capture_handler)
+    logger = logging.getLogger("rcli.tests.queue")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(queue_handler)
+    state = {"step": 1}
+    try:
+        for _ in range(3):
+            logger.debug("state=%s", state)
+            state["step"] += 1
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logger.exception("failed")
+    finally:
+        logger.removeHandler(queue_handler)
+    listener.start()
+    listener.stop()
+    lines = list(capture_handler.lines())
+    assert [_LOG.match(line).group("log") for line in lines[:3]] == [
+        "state={'step': 1}",
+        "state={'step': 2}",
+        "state={'step': 3}",
+    ]
+    assert "RuntimeError: boom" in lines[3]
+
+
+def test_color_formatter_detects_tty_once():
+    """Test that the console formatter only checks for a TTY once."""
+
+    class _Stream(object):
+        checks = 0
+
+        def isatty(self):
+            _Stream.checks += 1
+            return True
+
+    formatter = rcli.log._LogColorFormatter(_Stream())
+    records = [
+        logging.makeLogRecord({"levelno": level, "msg": "message"})
+        for level in (logging.DEBUG, logging.INFO, logging.ERROR)
+    ]
+    debug, info, error = (formatter.format(r) for r in records)
+    assert _Stream.checks == 1
+    assert debug.startswith(colorama.Style.BRIGHT + colorama.Fore.CYAN)
+    assert info.startswith(colorama.Style.BRIGHT + colorama.Fore.RESET)
+    assert error.startswith(colorama.Style.BRIGHT + colorama.Fore.RED)
+    assert _CTRL_CHAR.sub("", error).endswith("message")
+
+
+def test_capture_filter_levels_and_rate_limits():
+    """Test that capture-only records are filtered by logger settings."""
+    capture_filter = rcli.log._CaptureFilter(
+        logging.WARNING,
+        logging.DEBUG,
+        {"noisy": logging.ERROR},
+        {"chatty": 2},
+    )
+
+    def _record(name, level, created=0.0):
+        return logging.makeLogRecord(
+            {"name": name, "levelno": level, "created": created}
+        )
+
+    assert capture_filter.filter(_record("app", logging.DEBUG))
+    assert not capture_filter.filter(_record("noisy.child", logging.INFO))
+    console_only = _record("noisy", logging.WARNING)
+    assert capture_filter.filter(console_only)
+    assert console_only.rcli_captured is False
+    chatty = [
+        capture_filter.filter(_record("chatty.child", logging.DEBUG))
+        for _ in range(5)
+    ]
+    assert chatty == [True, True, False, False, False]
+    assert capture_filter.filter(_record("chatty", logging.DEBUG, 1.0))
+    assert capture_filter.filter(_record("chatty", logging.ERROR))
+
+
+def test_capture_lines_match_formatter():
+    """Test that captured lines are formatted as by a logging.Formatter."""
+    formatter = logging.Formatter(rcli.log._LOGFILE_FORMAT)
+    handler = rcli.log._CaptureHandler()
+    records = [
+        logging.makeLogRecord(
+            {"msg": "Record %d.", "args": (i,), "created": 1e9 + i / 3}
+        )
+        for i in range(4)
+    ]
+    records[1].exc_text = "Traceback:\n  boom"
+    records[2].stack_info = "Stack:\n  here"
+    for record in records:
+        handler.emit(record)
+    assert list(handler.lines()) == [
+        formatter.format(record) + "\n" for record in records
+    ]
+
+
+def test_compressed_capped_logfile(tmpdir, monkeypatch):
+    """Test that log files are compressed, capped and cleaned up."""
+    handler = rcli.log._CaptureHandler()
+    for i in range(1000):
+        handler.emit(
+            logging.makeLogRecord({"msg": "Record %d.", "args": (i,)})
+        )
+    monkeypatch.setattr(rcli.log, "_CAPTURE_HANDLER", handler)
+    monkeypatch.setattr(rcli.log.sys, "argv", ["say"])
+    old = tmpdir.join("say-20000101-000000.000000.log.gz")
+    old.write("")
+    rcli.log.configure_logfile(str(tmpdir), "gzip", 4096, 1)
+    try:
+        rcli.log.write_logfile()
+    finally:
+        rcli.log.configure_logfile()
+    (logfile,) = glob.glob(str(tmpdir.join("say-*.log.gz")))
+    with gzip.open(logfile, "rt") as log_file:
+        lines = log_file.read().splitlines()
+    assert not old.exists()
+    assert sum(len(line) + 1 for line in lines) <= 4096
+    assert lines[0].endswith("Record 0.")
+    assert lines[-1].endswith("Record 999.")
+    assert any(re.match(r"\.\.\. \d+ records omitted", line) for line in lines)